@@ -2,6 +2,7 @@
 Конфигурация PaddleOCR для настройки параметров детекции текста
 """
 import os
+from functools import lru_cache
 from typing import Optional
 
 # Основные настройки PaddleOCR
@@ -31,6 +32,10 @@ TEXT_QUALITY_CONFIG = {
     'min_avg_confidence': 0.20,      # Минимальная средняя уверенность по всем регионам
     'min_regions_count': 1,          # Минимум валидных регионов
     'min_letters_count': 3,          # Минимум буквенных символов в тексте
+    'black_text_upscale': 2,         # Увеличение полос при поиске чёрного тонкого текста
+    'early_exit_variants': 3,        # Сколько дешёвых вариантов изображения распознавать первым этапом
+    'early_exit_confidence': 0.85,   # Средняя уверенность первого этапа, после которой остальные варианты не нужны
+    'detector_first_pass': True,     # Сначала только детекция по всем вариантам, распознавание — по лучшему (если движок умеет)
 }
 
 # Настройки детекции множественных шрифтов
@@ -91,6 +96,7 @@ MULTIPLE_FONTS_SENSITIVITY_PRESETS = {
 
 # Настройки предобработки изображений
 IMAGE_PREPROCESSING_CONFIG = {
+    'max_image_side': 1600,              # Большие изображения один раз уменьшаются до этой длинной стороны
     'resize_threshold': 600,             # Порог для увеличения изображения
     'max_resize_scale': 4,               # Максимальный масштаб увеличения
     'contrast_alpha': 3.0,               # Коэффициент контраста
@@ -149,10 +155,21 @@ def get_ocr_config(image_type='default'):
     
     return config
 
+@lru_cache(maxsize=None)
 def get_text_quality_config():
-    """Получение конфигурации качества текста"""
+    """Получение конфигурации качества текста
+
+    Результат кэшируется: возвращается общий словарь, изменять его нельзя.
+    """
     return TEXT_QUALITY_CONFIG.copy()
 
+@lru_cache(maxsize=8)
+def _merge_multiple_fonts_config(eff_mode: str):
+    """Слияние пресета чувствительности с базовой конфигурацией (кэшируется по режиму)"""
+    preset = MULTIPLE_FONTS_SENSITIVITY_PRESETS[eff_mode]
+    # Сливаем пресет поверх базовой конфигурации
+    return MULTIPLE_FONTS_CONFIG | preset  # Python 3.9+: объединение словарей
+
 def get_multiple_fonts_config(mode: Optional[str] = None):
     """Получение конфигурации детекции множественных шрифтов
 
@@ -160,16 +177,14 @@ def get_multiple_fonts_config(mode: Optional[str] = None):
     1) Аргумент mode (strict|balanced|relaxed)
     2) Переменная окружения MULTIPLE_FONTS_SENSITIVITY
     3) balanced (по умолчанию)
+
+    Результат кэшируется по режиму: возвращается общий словарь, изменять его нельзя.
     """
-    base = MULTIPLE_FONTS_CONFIG.copy()
     env_mode = (os.getenv('MULTIPLE_FONTS_SENSITIVITY') or '').strip().lower()
     eff_mode = (mode or env_mode or 'strict').lower()
     if eff_mode not in MULTIPLE_FONTS_SENSITIVITY_PRESETS:
         eff_mode = 'balanced'
-    preset = MULTIPLE_FONTS_SENSITIVITY_PRESETS[eff_mode]
-    # Сливаем пресет поверх базовой конфигурации
-    merged = base | preset  # Python 3.9+: объединение словарей
-    return merged
+    return _merge_multiple_fonts_config(eff_mode)
 
 def get_preprocessing_config():
     """Получение конфигурации предобработки изображений"""
@@ -27,7 +27,7 @@ class FontDatabase:
     async def initialize(self):
         """Асинхронная инициализация базы данных"""
         try:
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             await loop.run_in_executor(self.executor, self._initialize_fonts)
             
             # Временно отключаем загрузку Google Fonts для тестирования
@@ -1057,7 +1057,7 @@ class FontDatabase:
     
     async def get_fonts(self, category: Optional[str] = None) -> List[FontInfo]:
         """Получение списка шрифтов"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
             self.executor, 
             self._get_fonts_sync, 
@@ -1079,7 +1079,7 @@ class FontDatabase:
     
     async def get_font_by_id(self, font_id: int) -> Optional[FontInfo]:
         """Получение шрифта по ID"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
             self.executor,
             self._get_font_by_id_sync,
@@ -1102,7 +1102,7 @@ class FontDatabase:
     
     async def search_fonts(self, query: str) -> List[FontInfo]:
         """Поиск шрифтов по названию"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
             self.executor,
             self._search_fonts_sync,
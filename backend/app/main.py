@@ -12,6 +12,10 @@ import logging
 import os
 from pathlib import Path
 import asyncio
+import io
+
+import numpy as np
+from PIL import Image
 
 from .services.font_analyzer import FontAnalyzer
 from .services.font_matcher import FontMatcher
@@ -61,6 +65,9 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 async def startup_event():
     """Инициализация при запуске приложения"""
     logger.info("Запуск MyFonts API...")
+    # Модели PaddleOCR уже загружены при создании FontAnalyzer; дожидаемся фонового прогрева,
+    # чтобы первый запрос не платил за ленивую инициализацию предикторов
+    await asyncio.to_thread(font_analyzer.paddleocr_service.wait_warmup)
     try:
         await font_database.initialize()
         logger.info("База данных шрифтов инициализирована")
@@ -76,6 +83,8 @@ async def startup_event():
 async def shutdown_event():
     """Очистка при остановке приложения"""
     logger.info("Остановка MyFonts API...")
+    # Пулы OCR (в том числе процессы с моделями при OCR_PROCESS_WORKERS > 0)
+    font_analyzer.paddleocr_service.shutdown()
 
 
 @app.get("/")
@@ -126,7 +135,8 @@ async def health_check():
 async def paddleocr_status():
     """Проверка статуса PaddleOCR"""
     try:
-        is_available = font_analyzer.paddleocr_service.is_available()
+        # Явный запрос статуса — с подробной диагностикой в лог
+        is_available = font_analyzer.paddleocr_service.diagnose()['available']
         
         if is_available:
             return {
@@ -199,18 +209,13 @@ async def paddleocr_test(file: UploadFile = File(...)):
         logger.info(f"📁 Получен файл: {file.filename}, размер: {len(contents)} байт")
         
         # Загружаем изображение
-        import cv2
-        import numpy as np
-        from PIL import Image
-        import io
-        
-        # Конвертируем bytes в numpy array
+        # Конвертируем bytes в numpy array. Сервис, как и FontAnalyzer._load_image, принимает RGB
+        # и сам один раз переводит уменьшенную копию в BGR для движка — здесь без лишней копии
         image = Image.open(io.BytesIO(contents))
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
         image_np = np.array(image)
         
-        if len(image_np.shape) == 3:
-            image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-        
         logger.info(f"🖼️ Изображение загружено: {image_np.shape}")
         
         # Тестируем PaddleOCR
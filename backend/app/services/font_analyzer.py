@@ -2,17 +2,18 @@
 Сервис анализа шрифтов с использованием PaddleOCR и OpenCV
 """
 
-import cv2
 import numpy as np
 from PIL import Image
 import io
 import logging
-from typing import Tuple, List, Dict, Any
+from typing import List, Dict, Any
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from statistics import fmean, median
 
-from ..models.font_models import FontCharacteristics, CyrillicFeatures
-from .paddleocr_service import PaddleOCRService
+from ..models.font_models import FontCharacteristics
+from ..config.ocr_config import get_text_quality_config
+from .paddleocr_service import get_paddleocr_service
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,7 @@ class FontAnalyzer:
     
     def __init__(self):
         self.executor = ThreadPoolExecutor(max_workers=4)
-        self.paddleocr_service = PaddleOCRService()
+        self.paddleocr_service = get_paddleocr_service()
         
         # Проверяем статус PaddleOCR
         if self.paddleocr_service.is_available():
@@ -36,12 +37,10 @@ class FontAnalyzer:
     
     async def _analyze_image_async(self, image_bytes: bytes, sensitivity: str | None = None) -> FontCharacteristics:
         """Асинхронный анализ изображения ТОЛЬКО через PaddleOCR"""
-        print("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: _analyze_image_async НАЧАЛСЯ")
-        logger.info("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: _analyze_image_async НАЧАЛСЯ")
+        logger.debug("🚀 _analyze_image_async НАЧАЛСЯ")
         try:
             # Загружаем изображение
-            print("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Загружаем изображение...")
-            logger.info("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Загружаем изображение...")
+            logger.debug("🚀 Загружаем изображение...")
             image = self._load_image(image_bytes)
             
             # Проверяем доступность PaddleOCR
@@ -58,11 +57,9 @@ class FontAnalyzer:
             
             # ШАГ 1: УЛУЧШЕННОЕ определение наличия текста через PaddleOCR
             logger.info("=== ШАГ 1: УЛУЧШЕННОЕ определение наличия текста через PaddleOCR ===")
-            print("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Вызываем PaddleOCR.analyze_image()")
-            logger.info("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Вызываем PaddleOCR.analyze_image()")
+            logger.debug("🚀 Вызываем PaddleOCR.analyze_image()")
             ocr_result = await self.paddleocr_service.analyze_image(image, sensitivity=sensitivity)
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: PaddleOCR вернул: {type(ocr_result)}")
-            logger.info(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: PaddleOCR вернул: {type(ocr_result)}")
+            logger.debug(f"🚀 PaddleOCR вернул: {type(ocr_result)}")
             
             # ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ OCR результата
             logger.info(f"🔍 PADDLEOCR РЕЗУЛЬТАТ:")
@@ -103,19 +100,16 @@ class FontAnalyzer:
             # ШАГ 5: Вывод результатов анализа
             logger.info("=== ШАГ 5: Вывод результатов анализа ===")
             logger.info("✅ Анализ завершен успешно через PaddleOCR")
-            print("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Анализ завершен успешно!")
-            logger.info("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Анализ завершен успешно!")
+            logger.debug("🚀 Анализ завершен успешно!")
             return characteristics
             
         except ValueError as logic_error:
             # Логические ошибки (нет текста, много шрифтов) - передаем пользователю
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Логическая ошибка: {str(logic_error)}")
             logger.info(f"ℹ️ Логический результат анализа: {str(logic_error)}")
             raise logic_error
             
         except Exception as error:
             # Технические ошибки
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Техническая ошибка: {str(error)}")
             logger.error(f"❌ Техническая ошибка анализа: {str(error)}")
             
             # Определяем тип ошибки и даем понятное сообщение
@@ -167,7 +161,6 @@ class FontAnalyzer:
                 }
             
             # 3. Проверка качества распознавания
-            from ..config.ocr_config import get_text_quality_config
             qcfg = get_text_quality_config()
             min_avg = float(qcfg.get('min_avg_confidence', 0.2))
             if confidence < min_avg:
@@ -396,12 +389,11 @@ class FontAnalyzer:
             # Ранний критерий одного шрифта: доминирующий кластер высот
             heights = [r.get('height', 0) for r in filtered_regions if r.get('height', 0) > 5]
             if len(heights) >= 3:
-                import numpy as np
-                h_arr = np.array(heights, dtype=float)
-                median_h = float(np.median(h_arr))
+                # Списки короткие: скалярная статистика дешевле создания numpy-массивов
+                median_h = float(median(heights))
                 if median_h > 0:
-                    in_band = np.logical_and(h_arr >= 0.7 * median_h, h_arr <= 1.3 * median_h)
-                    frac_in_band = float(np.sum(in_band)) / float(len(h_arr))
+                    lo, hi = 0.7 * median_h, 1.3 * median_h
+                    frac_in_band = sum(lo <= h <= hi for h in heights) / len(heights)
                     logger.info(f"Доля высот в [0.7..1.3] от медианы: {frac_in_band:.2f}")
                     if frac_in_band >= 0.8:
                         logger.info("✅ Доминирует один кластер высот (>=80%) — считаем один шрифт")
@@ -443,18 +435,16 @@ class FontAnalyzer:
             heights = [region.get('height', 0) for region in filtered]
             heights = [h for h in heights if h > 5]  # Фильтруем слишком маленькие
             
-            logger.info(f"Высоты областей: {heights}")
+            logger.debug("Высоты областей: %s", heights)
             
             if len(heights) >= 2:
-                import numpy as np
-                heights_array = np.array(heights)
-                # Робастные метрики по медиане
-                median_h = float(np.median(heights_array))
-                mad = float(np.median(np.abs(heights_array - median_h)) + 1e-6)
+                # Робастные метрики по медиане (скалярно: на десятках значений numpy — лишние накладные)
+                median_h = float(median(heights))
+                mad = float(median([abs(h - median_h) for h in heights])) + 1e-6
                 std_height = 1.4826 * mad
-                mean_height = float(np.mean(heights_array))
-                max_height = np.max(heights_array)
-                min_height = np.min(heights_array)
+                mean_height = fmean(heights)
+                max_height = max(heights)
+                min_height = min(heights)
                 
                 # Коэффициент вариации
                 height_variation = std_height / median_h if median_h > 0 else 0
@@ -480,9 +470,8 @@ class FontAnalyzer:
             areas = [a for a in areas if a > 25]  # Фильтруем слишком маленькие
             
             if len(areas) >= 2:
-                import numpy as np
-                areas_array = np.array(areas)
-                area_ratio = np.max(areas_array) / np.min(areas_array) if np.min(areas_array) > 0 else 1
+                min_area = min(areas)
+                area_ratio = max(areas) / min_area if min_area > 0 else 1
                 
                 logger.info(f"Соотношение площадей: {area_ratio:.2f}")
                 
@@ -493,11 +482,21 @@ class FontAnalyzer:
             # 3. Анализ текстового содержимого
             words = text_content.split()
             if len(words) >= 6:
-                # Анализ стилей
-                has_uppercase = any(word.isupper() and len(word) > 1 for word in words)
-                has_lowercase = any(word.islower() and len(word) > 1 for word in words)
-                has_mixed_case = any(word[0].isupper() and any(c.islower() for c in word[1:]) for word in words if len(word) > 1)
-                has_numbers = any(any(c.isdigit() for c in word) for word in words)
+                # Анализ стилей: один проход по словам вместо четырёх; проверки символов —
+                # через map(str.is*) (цикл в C), выходим, как только найдены все четыре стиля
+                has_uppercase = has_lowercase = has_mixed_case = has_numbers = False
+                for word in words:
+                    if len(word) > 1:
+                        if not has_uppercase and word.isupper():
+                            has_uppercase = True
+                        if not has_lowercase and word.islower():
+                            has_lowercase = True
+                        if not has_mixed_case and word[0].isupper() and any(map(str.islower, word[1:])):
+                            has_mixed_case = True
+                    if not has_numbers and any(map(str.isdigit, word)):
+                        has_numbers = True
+                    if has_uppercase and has_lowercase and has_mixed_case and has_numbers:
+                        break
                 
                 style_count = sum([has_uppercase, has_lowercase, has_mixed_case, has_numbers])
                 
@@ -516,7 +515,7 @@ class FontAnalyzer:
                 
                 if len(clusters) >= 2:
                     # Требуем достаточную поддержку обоих кластеров и явную разницу
-                    cluster_means = [np.mean(cluster) for cluster in clusters]
+                    cluster_means = [fmean(cluster) for cluster in clusters]
                     cluster_sizes = [len(cluster) for cluster in clusters]
                     cluster_ratio = max(cluster_means) / min(cluster_means) if min(cluster_means) > 0 else 1
                     if cluster_ratio > 2.0 and min(cluster_sizes) >= 3:
@@ -542,22 +541,23 @@ class FontAnalyzer:
         if len(heights) < 2:
             return [heights]
         
-        import numpy as np
         sorted_heights = sorted(heights)
         clusters = []
         current_cluster = [sorted_heights[0]]
+        # Среднее кластера — через накопленную сумму, без np.mean по всему кластеру на каждом шаге
+        cluster_sum = float(sorted_heights[0])
         
         for height in sorted_heights[1:]:
             # Если высота близка к среднему текущего кластера
-            cluster_mean = np.mean(current_cluster)
-            relative_diff = abs(height - cluster_mean) / cluster_mean
-            
-            if relative_diff <= threshold:
+            cluster_mean = cluster_sum / len(current_cluster)
+            if cluster_mean != 0 and abs(height - cluster_mean) / cluster_mean <= threshold:
                 current_cluster.append(height)
+                cluster_sum += height
             else:
                 # Начинаем новый кластер
                 clusters.append(current_cluster)
                 current_cluster = [height]
+                cluster_sum = float(height)
         
         clusters.append(current_cluster)
         return clusters
@@ -598,9 +598,10 @@ class FontAnalyzer:
             height_ratio = max(heights) / min(heights)
             area_ratio = max(areas) / min(areas)
             
-            # Анализируем распределение размеров
-            height_std = np.std(heights)
-            height_mean = np.mean(heights)
+            # Анализируем распределение размеров (скалярно: N мало, numpy здесь — лишние накладные)
+            n_heights = len(heights)
+            height_mean = sum(heights) / n_heights
+            height_std = (sum((h - height_mean) ** 2 for h in heights) / n_heights) ** 0.5
             height_cv = height_std / height_mean if height_mean > 0 else 0  # Коэффициент вариации
             
             # Детекция множественных шрифтов по размерам
@@ -645,15 +646,19 @@ class FontAnalyzer:
         sorted_sizes = sorted(sizes)
         clusters = []
         current_cluster = [sorted_sizes[0]]
+        cluster_sum = float(sorted_sizes[0])
         
         for size in sorted_sizes[1:]:
             # Если размер близок к текущему кластеру, добавляем в него
-            if abs(size - np.mean(current_cluster)) / np.mean(current_cluster) <= threshold:
+            cluster_mean = cluster_sum / len(current_cluster)
+            if cluster_mean != 0 and abs(size - cluster_mean) / cluster_mean <= threshold:
                 current_cluster.append(size)
+                cluster_sum += size
             else:
                 # Начинаем новый кластер
                 clusters.append(current_cluster)
                 current_cluster = [size]
+                cluster_sum = float(size)
         
         clusters.append(current_cluster)
         return clusters
@@ -778,27 +783,27 @@ class FontAnalyzer:
             # Анализ текста
             words = text_content.split()
             word_count = len(words)
-            avg_word_length = np.mean([len(word) for word in words]) if words else 0
-            
-            # Анализ размеров из OCR boxes
-            heights = []
-            widths = []
-            areas = []
-            
-            for box_info in ocr_boxes:
-                if isinstance(box_info, list) and len(box_info) >= 2:
-                    box = box_info[0]  # координаты
-                    if isinstance(box, list) and len(box) >= 4:
-                        # Вычисляем размеры box
-                        x_coords = [point[0] for point in box]
-                        y_coords = [point[1] for point in box]
-                        
-                        width = max(x_coords) - min(x_coords)
-                        height = max(y_coords) - min(y_coords)
-                        
-                        heights.append(height)
-                        widths.append(width)
-                        areas.append(width * height)
+            avg_word_length = fmean(map(len, words)) if words else 0
+            
+            # Анализ размеров из OCR boxes: координаты всех box'ов — один массив (N, точки, 2),
+            # размеры считаются векторно вместо циклов по точкам
+            boxes = [box_info[0] for box_info in ocr_boxes
+                     if isinstance(box_info, list) and len(box_info) >= 2
+                     and isinstance(box_info[0], list) and len(box_info[0]) >= 4]
+            widths = heights = np.empty(0)
+            if boxes:
+                try:
+                    pts = np.asarray(boxes, dtype=np.float64)
+                except ValueError:
+                    # Разное число точек у полигонов — без общего массива
+                    pts = None
+                if pts is not None and pts.ndim == 3:
+                    widths = np.ptp(pts[:, :, 0], axis=1)
+                    heights = np.ptp(pts[:, :, 1], axis=1)
+                else:
+                    spans = np.array([np.ptp(np.asarray(box, dtype=np.float64)[:, :2], axis=0) for box in boxes])
+                    widths, heights = spans[:, 0], spans[:, 1]
+            areas = widths * heights
             
             # Характеристики на основе OCR данных
             characteristics = {
@@ -806,11 +811,11 @@ class FontAnalyzer:
                 'word_count': word_count,
                 'regions_count': regions_count,
                 'avg_word_length': avg_word_length,
-                'avg_height': np.mean(heights) if heights else 20.0,
-                'avg_width': np.mean(widths) if widths else 100.0,
-                'avg_area': np.mean(areas) if areas else 2000.0,
-                'height_variance': np.var(heights) if len(heights) > 1 else 0.0,
-                'width_variance': np.var(widths) if len(widths) > 1 else 0.0,
+                'avg_height': heights.mean() if heights.size else 20.0,
+                'avg_width': widths.mean() if widths.size else 100.0,
+                'avg_area': areas.mean() if areas.size else 2000.0,
+                'height_variance': heights.var() if heights.size > 1 else 0.0,
+                'width_variance': widths.var() if widths.size > 1 else 0.0,
                 'has_uppercase': any(c.isupper() for c in text_content),
                 'has_lowercase': any(c.islower() for c in text_content),
                 'has_numbers': any(c.isdigit() for c in text_content),
@@ -844,14 +849,6 @@ class FontAnalyzer:
             'text_density': 0.0
         }
     
-    def _binarize_image(self, gray: np.ndarray) -> np.ndarray:
-        """Бинаризация изображения"""
-        # Используем адаптивную бинаризацию для лучшего результата
-        binary = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-        )
-        return binary
-    
     async def _extract_characteristics_from_ocr(self, image: np.ndarray, ocr_result: dict) -> FontCharacteristics:
         """Извлечение характеристик шрифта ТОЛЬКО из OCR"""
         
@@ -869,7 +866,6 @@ class FontAnalyzer:
         # Проверяем качество распознавания
         confidence = ocr_result.get('confidence', 0.0)
         # Синхронизируем порог с конфигом качества; при низкой уверенности продолжаем, но логируем предупреждение
-        from ..config.ocr_config import get_text_quality_config
         quality_cfg = get_text_quality_config()
         min_avg = quality_cfg.get('min_avg_confidence', 0.05)
         if confidence < min_avg:
@@ -967,163 +963,7 @@ class FontAnalyzer:
         
         return has_formal_text and stable_sizes
     
-    def _detect_serifs(self, binary: np.ndarray) -> bool:
-        """Определение наличия засечек"""
-        # Применяем морфологические операции для выделения мелких деталей
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        opened = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
-        
-        # Находим разность - мелкие детали (потенциальные засечки)
-        diff = cv2.absdiff(binary, opened)
-        serif_pixels = np.sum(diff == 255)
-        total_text_pixels = np.sum(binary == 0)  # Черные пиксели в бинарном изображении
-        
-        if total_text_pixels == 0:
-            return False
-        
-        serif_ratio = serif_pixels / total_text_pixels
-        has_serifs = serif_ratio > 0.05  # Эмпирический порог
-        
-        logger.info(f"Анализ засечек: соотношение={serif_ratio:.3f}, результат={has_serifs}")
-        return has_serifs
-    
-    def _analyze_stroke_width(self, binary: np.ndarray) -> float:
-        """Анализ толщины штрихов"""
-        # Используем расстояние до ближайшего нуля (distance transform)
-        dist_transform = cv2.distanceTransform(255 - binary, cv2.DIST_L2, 5)
-        
-        # Находим среднюю толщину штрихов
-        text_pixels = binary == 0
-        if np.sum(text_pixels) == 0:
-            return 0.1
-        
-        avg_thickness = np.mean(dist_transform[text_pixels]) * 2  # Умножаем на 2 для полной ширины
-        
-        # Нормализуем относительно размера изображения
-        normalized_thickness = avg_thickness / max(binary.shape)
-        
-        # Дополнительная нормализация для гарантии диапазона [0, 1]
-        normalized_thickness = normalized_thickness / 10.0  # Делим на 10 для более реалистичных значений
-        
-        return min(1.0, max(0.0, normalized_thickness))
-    
-    def _analyze_contrast(self, gray: np.ndarray) -> float:
-        """Анализ контраста"""
-        # Вычисляем стандартное отклонение как меру контраста
-        std_dev = np.std(gray)
-        
-        # Нормализуем к диапазону 0-1
-        contrast = std_dev / 128.0
-        
-        return min(1.0, max(0.0, contrast))
-    
-    def _analyze_slant(self, binary: np.ndarray) -> float:
-        """Анализ наклона текста"""
-        # Используем преобразование Хафа для поиска доминирующих линий
-        edges = cv2.Canny(binary, 50, 150)
-        lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=50)
-        
-        if lines is None:
-            return 0.0
-        
-        angles = []
-        for line in lines[:20]:  # Берем первые 20 линий
-            rho, theta = line[0]
-            angle = theta * 180 / np.pi
-            
-            # Интересуют вертикальные линии (около 90 градусов)
-            if 80 <= angle <= 100:
-                angles.append(angle - 90)
-        
-        if not angles:
-            return 0.0
-        
-        # Возвращаем средний наклон
-        return np.mean(angles)
-    
-    def _analyze_geometry(self, binary: np.ndarray) -> Tuple[float, float, float, float]:
-        """Анализ геометрических характеристик"""
-        # Находим контуры букв
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if not contours:
-            return 50.0, 70.0, 80.0, 20.0
-        
-        # Анализируем высоты букв
-        heights = []
-        for contour in contours:
-            _, _, _, h = cv2.boundingRect(contour)
-            if h > 10:  # Фильтруем слишком маленькие контуры
-                heights.append(h)
-        
-        if not heights:
-            return 50.0, 70.0, 80.0, 20.0
-        
-        # Эмпирические соотношения для кириллических шрифтов
-        avg_height = np.mean(heights)
-        x_height = avg_height * 0.5
-        cap_height = avg_height * 0.7
-        ascender = avg_height * 0.8
-        descender = avg_height * 0.2
-        
-        return x_height, cap_height, ascender, descender
-    
-    def _analyze_spacing(self, binary: np.ndarray) -> Tuple[float, float]:
-        """Анализ межбуквенных и межсловных расстояний"""
-        # Упрощенный анализ - в реальности нужен более сложный алгоритм
-        height, width = binary.shape
-        
-        # Анализируем горизонтальные проекции для определения расстояний
-        horizontal_projection = np.sum(binary == 0, axis=0)
-        
-        # Находим промежутки между буквами
-        gaps = []
-        in_gap = False
-        gap_start = 0
-        
-        for i, projection in enumerate(horizontal_projection):
-            if projection == 0 and not in_gap:  # Начало промежутка
-                in_gap = True
-                gap_start = i
-            elif projection > 0 and in_gap:  # Конец промежутка
-                gaps.append(i - gap_start)
-                in_gap = False
-        
-        if gaps:
-            letter_spacing = np.mean(gaps)
-            word_spacing = np.percentile(gaps, 75) if len(gaps) > 1 else letter_spacing * 2
-        else:
-            letter_spacing = 2.0
-            word_spacing = 6.0
-        
-        return letter_spacing, word_spacing
-    
-    def _calculate_density(self, binary: np.ndarray) -> float:
-        """Расчет плотности текста"""
-        text_pixels = np.sum(binary == 0)
-        total_pixels = binary.shape[0] * binary.shape[1]
-        
-        return text_pixels / total_pixels if total_pixels > 0 else 0.0
-    
-    def _analyze_cyrillic_features(self, binary: np.ndarray) -> CyrillicFeatures:
-        """
-        Анализ особенностей кириллических букв
-        Упрощенная версия - в реальности нужно распознавание конкретных букв
-        """
-        # Пока возвращаем случайные значения на основе общих характеристик изображения
-        height, width = binary.shape
-        text_density = self._calculate_density(binary)
-        
-        # Генерируем характеристики на основе свойств изображения
-        base_value = (height * width) % 100 / 100
-        
-        return CyrillicFeatures(
-            ya_shape=0.5 + (text_density * base_value) % 0.4,
-            zh_shape=0.6 + (width % 50) / 125,
-            fi_shape=0.7 + (height % 30) / 100,
-            shcha_shape=0.8 + (text_density * 100) % 20 / 100,
-            yery_shape=0.5 + ((width + height) % 50) / 100
-        )
+
     
 
     
@@ -3,18 +3,45 @@
 """
 
 import logging
+import re
 import numpy as np
 import cv2
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Iterator
 from pathlib import Path
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import gc
+import hashlib
+import heapq
+import inspect
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
+from statistics import fmean, median
 
-from ..config.ocr_config import get_ocr_config, get_text_quality_config, get_multiple_fonts_config
+from ..config.ocr_config import get_ocr_config, get_text_quality_config, get_multiple_fonts_config, get_preprocessing_config
 
 # Сначала определяем logger
 logger = logging.getLogger(__name__)
 
+# Кириллица А..я (U+0410..U+044F)
+_CYR_RE = re.compile(r'[\u0410-\u044F]')
+# Всё, кроме букв/цифр и пробельных символов (эквивалент фильтра isalnum() or isspace())
+_NON_TEXT_RE = re.compile(r'[^\w\s]|_')
+
+# LUT для HSV: сдвиг тона на 90° (по модулю 180), S и V без изменений.
+# После сдвига обе дуги красного ([0..10] и [170..180]) становятся одним диапазоном [80..100]
+_RED_HUE_SHIFT_LUT = np.stack(
+    [(np.arange(256) + 90) % 180, np.arange(256), np.arange(256)], axis=1
+).astype(np.uint8).reshape(256, 1, 3)
+_RED_SHIFTED_LOWER = np.array([80, 80, 40], dtype=np.uint8)
+_RED_SHIFTED_UPPER = np.array([100, 255, 255], dtype=np.uint8)
+
 # Проверяем доступность основных зависимостей
 try:
     import numpy as np
@@ -30,6 +57,18 @@ except ImportError as e:
     logger.error(f"❌ OpenCV не доступен: {str(e)}")
     raise
 
+# Общий кэш моделей (OCR_MODEL_CACHE), чтобы не скачивать их заново на каждом чистом запуске:
+# PaddleOCR 2.x читает PADDLE_OCR_BASE_DIR, 3.x (PaddleX) — PADDLE_PDX_CACHE_HOME.
+# Задаём до импорта paddleocr — пути фиксируются при импорте
+_model_cache_dir = os.getenv("OCR_MODEL_CACHE", "").strip()
+if _model_cache_dir:
+    os.environ.setdefault("PADDLE_OCR_BASE_DIR", _model_cache_dir)
+    os.environ.setdefault("PADDLE_PDX_CACHE_HOME", _model_cache_dir)
+    if os.path.isdir(_model_cache_dir) and os.listdir(_model_cache_dir):
+        logger.info(f"📦 Кэш моделей PaddleOCR: {_model_cache_dir}")
+    else:
+        logger.info(f"📦 Кэш моделей PaddleOCR пуст, модели будут скачаны в {_model_cache_dir}")
+
 try:
     from paddleocr import PaddleOCR
     PADDLEOCR_AVAILABLE = True
@@ -54,13 +93,137 @@ else:
     logger.error("❌ PaddleOCR не импортирован")
 
 
+def _gray_to_rgb_view(gray: np.ndarray) -> np.ndarray:
+    """Трёхканальное представление серого изображения без копирования (stride 0 по каналам).
+    Вид только для чтения; непрерывный буфер создаётся лишь перед подачей в OCR.
+    """
+    return np.broadcast_to(gray[:, :, None], (gray.shape[0], gray.shape[1], 3))
+
+
+def _mean_saturation(rgb: np.ndarray) -> float:
+    """Средняя насыщенность S из HSV (0..255): (max - min) / max по каналам.
+    Поканальные max/min и деление — векторные операции OpenCV над uint8 без float-копий области;
+    деление на ноль OpenCV даёт 0 — как и формула при max = 0.
+    """
+    c0, c1, c2 = cv2.split(rgb)
+    mx = cv2.max(cv2.max(c0, c1), c2)
+    mn = cv2.min(cv2.min(c0, c1), c2)
+    return cv2.mean(cv2.divide(cv2.subtract(mx, mn), mx, scale=255.0, dtype=cv2.CV_32F))[0]
+
+
+def _mean_lab_lightness(rgb: np.ndarray) -> float:
+    """Средняя яркость L из LAB (0..255 для uint8); cv2.mean сразу по каналам, без извлечения L"""
+    return float(cv2.mean(cv2.cvtColor(rgb, cv2.COLOR_RGB2LAB))[0])
+
+
+def _scan_bands(proj: np.ndarray, threshold: int) -> np.ndarray:
+    """Поиск горизонтальных полос, где проекция не ниже порога.
+    Возвращает массив int32 формы (N, 2) с парами (y1, y2); полоса, упирающаяся
+    в нижний край, заканчивается на h - 1.
+    """
+    h = proj.shape[0]
+    above = (proj >= threshold).view(np.int8)
+    edges = np.diff(above, prepend=np.int8(0), append=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if ends.size and ends[-1] == h:
+        ends[-1] = h - 1
+    return np.stack((starts, ends), axis=1).astype(np.int32)
+
+
+# Процессный пул (OCR_PROCESS_WORKERS > 0): в каждом процессе — свой прогретый экземпляр сервиса
+_worker_service: Optional["PaddleOCRService"] = None
+
+
+def _process_worker_init() -> None:
+    """Инициализатор процесса пула: один раз загружает PaddleOCR в этом процессе"""
+    global _worker_service
+    # Внутри воркера — обычный потоковый режим, без вложенного пула процессов
+    os.environ["OCR_PROCESS_WORKERS"] = "0"
+    _worker_service = PaddleOCRService()
+
+
+def _process_worker_run(shm_name: str, shape: Tuple[int, ...], dtype: str) -> Dict[str, Any]:
+    """Запуск _run_ocr_sync в процессе пула; изображение читается из общей памяти, а не через pickle"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Локальная копия: регионы результата — срезы изображения и не должны
+        # ссылаться на сегмент, который родитель освободит после ответа
+        image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf).copy()
+    finally:
+        shm.close()
+    return _worker_service._run_ocr_sync(image)
+
+
+def _image_cache_key(image: np.ndarray) -> Tuple:
+    """Ключ кэша результатов: форма, тип и хэш пикселей (hashlib отпускает GIL на больших буферах)"""
+    digest = hashlib.blake2b(np.ascontiguousarray(image).data, digest_size=16).digest()
+    return image.shape, image.dtype.str, digest
+
+
 class PaddleOCRService:
     """Сервис для профессиональной детекции и анализа текста с помощью PaddleOCR"""
     
     def __init__(self):
         self.ocr = None
         self.ocr_loose = None
-        self.executor = ThreadPoolExecutor(max_workers=1)
+        # Несколько запросов могут готовить варианты параллельно, а вызовы движка
+        # от одновременных запросов склеиваются в общий пакет (см. _submit_to_batch).
+        # Потоки executor'а работают как конвейер: пока один запрос в движке (под _ocr_lock),
+        # второй строит варианты, а третий разбирает регионы — по умолчанию по потоку на этап
+        self._max_parallel_requests = max(1, int(os.getenv("OCR_MAX_PARALLEL_REQUESTS", "3")))
+        self.executor = ThreadPoolExecutor(max_workers=self._max_parallel_requests)
+        self._inflight = 0
+        self._batch_cond = threading.Condition()
+        self._batch_pending: List[Dict[str, Any]] = []
+        self._batch_leader = False
+        self._batch_wait = max(0.0, float(os.getenv("OCR_BATCH_WAIT_MS", "20")) / 1000.0)
+        self._batch_max = max(1, int(os.getenv("OCR_MAX_BATCH", "32")))
+        # Кэш результатов для побайтно одинаковых изображений (повторная загрузка того же файла):
+        # OCR_RESULT_CACHE записей, 0 — выключен. Движок детерминирован, поэтому повтор не нужен
+        self._result_cache_size = max(0, int(os.getenv("OCR_RESULT_CACHE", "32")))
+        self._result_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._result_cache_lock = threading.Lock()
+        # Опционально — пул процессов с собственными экземплярами PaddleOCR: Python-часть
+        # предобработки/разбора не упирается в GIL. spawn, а не fork: в родителе уже есть потоки
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        process_workers = max(0, int(os.getenv("OCR_PROCESS_WORKERS", "0")))
+        if process_workers:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_process_worker_init,
+            )
+            logger.info(f"🧵 OCR в пуле процессов: {process_workers} воркер(а)")
+        
+        # Общий пул для независимых операций OpenCV (варианты, полосы _detect_black_text_lines):
+        # OpenCV отпускает GIL, поэтому потоки масштабируются. Внутренний пул самого OpenCV
+        # при этом ограничиваем (OCR_CV_THREADS, по умолчанию 1), чтобы не было переподписки ядер
+        cv_threads = int(os.getenv("OCR_CV_THREADS", "1"))
+        if cv_threads >= 0:
+            cv2.setNumThreads(cv_threads)
+        self._cv_pool = ThreadPoolExecutor(
+            max_workers=max(1, int(os.getenv("OCR_CONCURRENCY", str(os.cpu_count() or 4))))
+        )
+        
+        # Переиспользуемые объекты OpenCV для вариантов и _detect_black_text_lines (создаём один раз)
+        self._k3 = np.ones((3, 3), np.uint8)
+        self._kh9 = np.ones((1, 9), np.uint8)
+        # CLAHE хранит внутренние буферы, поэтому экземпляры кэшируются по потокам (см. _get_clahe);
+        # общий движок OCR — под блокировкой
+        self._cv_local = threading.local()
+        self._ocr_lock = threading.Lock()
+        # Флаг доступности кэшируется: пересчитывается только при (пере)инициализации
+        self._available = False
+        self._det_only_supported = False
+        self._warmup_thread: Optional[threading.Thread] = None
+        # Otsu по регионам через OpenCL (T-API) — только по явному запросу: для мелких ROI
+        # накладные расходы на передачу данных обычно больше выигрыша
+        self._use_opencl = os.getenv("OCR_USE_OPENCL", "0").strip().lower() in ("1", "true", "yes")
+        if self._use_opencl:
+            self._use_opencl = cv2.ocl.haveOpenCL()
+            cv2.ocl.setUseOpenCL(self._use_opencl)
+            logger.info(f"🧮 OpenCL для метрик регионов: {'включён' if self._use_opencl else 'недоступен'}")
         
         # Безопасная инициализация
         try:
@@ -69,6 +232,7 @@ class PaddleOCRService:
             logger.error(f"❌ Ошибка инициализации в конструкторе: {str(init_error)}")
             logger.error(f"💡 Тип ошибки: {type(init_error).__name__}")
             # Не падаем, просто оставляем self.ocr = None
+        self._refresh_available()
     
     def _initialize_ocr(self):
         """Инициализация PaddleOCR с максимально агрессивными настройками"""
@@ -102,9 +266,73 @@ class PaddleOCRService:
                     'use_angle_cls': True,
                 }
             
+            # Собственные модели (например, INT8-экспорт PaddleSlim): каталоги inference-моделей
+            # из OCR_DET_MODEL_DIR / OCR_REC_MODEL_DIR / OCR_CLS_MODEL_DIR. Имена параметров — 2.x,
+            # PaddleOCR 3.x принимает их как устаревшие синонимы text_*_model_dir
+            for key, env_name in (('det_model_dir', 'OCR_DET_MODEL_DIR'),
+                                  ('rec_model_dir', 'OCR_REC_MODEL_DIR'),
+                                  ('cls_model_dir', 'OCR_CLS_MODEL_DIR')):
+                model_dir = os.getenv(env_name, '').strip()
+                if not model_dir:
+                    continue
+                if Path(model_dir).is_dir():
+                    ocr_config[key] = model_dir
+                else:
+                    logger.warning(f"⚠️ {env_name}={model_dir} не найден, используем модель по умолчанию")
+            # ONNX Runtime вместо Paddle Inference (PaddleOCR 2.x, use_onnx): каталоги моделей
+            # выше должны указывать на экспорт paddle2onnx. В 3.x ONNX Runtime выбирается через enable_hpi
+            if os.getenv("OCR_USE_ONNX", "0").strip().lower() in ("1", "true", "yes"):
+                if 'det_model_dir' in ocr_config and 'rec_model_dir' in ocr_config:
+                    ocr_config['use_onnx'] = True
+                else:
+                    logger.warning("⚠️ OCR_USE_ONNX требует OCR_DET_MODEL_DIR и OCR_REC_MODEL_DIR с ONNX-моделями")
+            # Параметры конструктора установленной версии: имена в 2.x и 3.x различаются
+            try:
+                init_params = inspect.signature(PaddleOCR.__init__).parameters
+            except (TypeError, ValueError):
+                init_params = {}
+            # GPU (OCR_USE_GPU=1) — только если Paddle собран с CUDA. Половинная точность на GPU
+            # задаётся через OCR_PRECISION=fp16 (применяется в конфигурации enable_hpi ниже)
+            if os.getenv("OCR_USE_GPU", "0").strip().lower() in ("1", "true", "yes"):
+                try:
+                    import paddle
+                    gpu_available = paddle.device.is_compiled_with_cuda()
+                except Exception:
+                    gpu_available = False
+                if gpu_available:
+                    if 'device' in init_params:
+                        ocr_config['device'] = 'gpu'
+                    else:
+                        ocr_config['use_gpu'] = True
+                    # Полный перебор алгоритмов свёртки cuDNN (OCR_CUDNN_EXHAUSTIVE=1): быстрее эвристики
+                    # по умолчанию, но поиск повторяется для каждой новой формы входа — выгодно,
+                    # когда размеры изображений повторяются
+                    if os.getenv("OCR_CUDNN_EXHAUSTIVE", "0").strip().lower() in ("1", "true", "yes"):
+                        try:
+                            paddle.set_flags({
+                                'FLAGS_cudnn_exhaustive_search': True,
+                                'FLAGS_conv_workspace_size_limit': 4000,
+                            })
+                        except Exception as flags_error:
+                            logger.warning(f"⚠️ Флаги cuDNN не применены: {str(flags_error)}")
+                else:
+                    logger.warning("⚠️ OCR_USE_GPU: Paddle собран без CUDA, остаёмся на CPU")
+            # Батч распознавания (OCR_REC_BATCH): Paddle Inference резервирует память пропорционально
+            # батчу, поэтому без склейки запросов (OCR_MAX_PARALLEL_REQUESTS=1) берём 1,
+            # иначе — значение движка по умолчанию. В 3.x параметр называется text_recognition_batch_size
+            rec_batch = os.getenv("OCR_REC_BATCH", "").strip()
+            if not rec_batch and self._max_parallel_requests == 1:
+                rec_batch = "1"
+            if rec_batch:
+                rec_batch_key = ('text_recognition_batch_size'
+                                 if 'text_recognition_batch_size' in init_params else 'rec_batch_num')
+                ocr_config[rec_batch_key] = max(1, int(rec_batch))
+            
             logger.info("🚀 Инициализация PaddleOCR с переданной конфигурацией...")
             # Логируем только доступные ключи
-            for k in ['lang', 'use_angle_cls', 'det_db_thresh', 'det_db_box_thresh', 'det_db_unclip_ratio', 'det_limit_side_len', 'det_limit_type']:
+            for k in ['lang', 'use_angle_cls', 'det_db_thresh', 'det_db_box_thresh', 'det_db_unclip_ratio', 'det_limit_side_len', 'det_limit_type',
+                      'det_model_dir', 'rec_model_dir', 'cls_model_dir', 'use_onnx',
+                      'rec_batch_num', 'text_recognition_batch_size', 'device', 'use_gpu']:
                 if k in ocr_config:
                     logger.info(f"  - {k}: {ocr_config.get(k)}")
             
@@ -113,7 +341,41 @@ class PaddleOCRService:
             logger.info(f"📋 Конфигурация: {ocr_config}")
             
             try:
-                self.ocr = PaddleOCR(**ocr_config)
+                # PaddleOCR 3.x: высокопроизводительный бэкенд (ONNX Runtime / OpenVINO / TensorRT).
+                # Требует дополнительных зависимостей; если их нет — создаём движок с обычным
+                # Paddle Inference. PaddleOCR 2.x принимает **kwargs и молча проглатывает незнакомые
+                # ключи, поэтому enable_hpi передаём только если он есть в сигнатуре конструктора
+                hpi_requested = os.getenv("OCR_ENABLE_HPI", "1").strip().lower() in ("1", "true", "yes")
+                if hpi_requested and 'enable_hpi' not in init_params:
+                    logger.info("ℹ️ OCR_ENABLE_HPI: установленная версия PaddleOCR не поддерживает enable_hpi, используем стандартный бэкенд")
+                if hpi_requested and 'enable_hpi' in init_params:
+                    hpi_config = dict(ocr_config, enable_hpi=True)
+                    precision = os.getenv("OCR_PRECISION", "").strip().lower()
+                    if precision:
+                        hpi_config['precision'] = precision
+                    try:
+                        self.ocr = PaddleOCR(**hpi_config)
+                        logger.info(f"⚡ Включён высокопроизводительный бэкенд PaddleOCR (enable_hpi, precision={precision or 'по умолчанию'})")
+                    except Exception as hpi_error:
+                        self.ocr = None
+                        logger.warning(f"⚠️ enable_hpi недоступен, используем стандартный бэкенд: {str(hpi_error)}")
+                if self.ocr is None:
+                    # Стандартный бэкенд на CPU: MKL-DNN (oneDNN) и потоки по числу ядер
+                    # (OCR_CPU_THREADS). Если версия PaddleOCR не знает этих параметров —
+                    # создаём движок с конфигурацией как есть
+                    cpu_config = dict(
+                        ocr_config,
+                        enable_mkldnn=True,
+                        cpu_threads=max(1, int(os.getenv("OCR_CPU_THREADS", str(os.cpu_count() or 4)))),
+                    )
+                    try:
+                        self.ocr = PaddleOCR(**cpu_config)
+                        logger.info(f"🧮 PaddleOCR на CPU: MKL-DNN, потоков: {cpu_config['cpu_threads']}")
+                    except Exception as cpu_error:
+                        self.ocr = None
+                        logger.warning(f"⚠️ CPU-параметры PaddleOCR не приняты, используем значения по умолчанию: {str(cpu_error)}")
+                if self.ocr is None:
+                    self.ocr = PaddleOCR(**ocr_config)
                 logger.info("✅ PaddleOCR объект создан с агрессивными настройками")
                 logger.info("✅ Агрессивные настройки применены")
                 
@@ -151,44 +413,52 @@ class PaddleOCRService:
             
             logger.info("✅ PaddleOCR объект создан успешно")
             
-            # Делаем тестовый вызов для проверки работоспособности
-            logger.info("🧪 Тестируем PaddleOCR...")
-            try:
-                # Создаем тестовое изображение с текстом
-                test_image = np.ones((200, 400, 3), dtype=np.uint8) * 255
-                # Добавляем простой черный текст
-                cv2.putText(test_image, "TEST", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
-                logger.info("🖼️ Создано тестовое изображение 200x400 с текстом 'TEST'")
-                
-                # Проверяем что у объекта есть метод predict
-                if not hasattr(self.ocr, 'ocr') or not callable(getattr(self.ocr, 'ocr', None)):
-                    logger.error("❌ У объекта PaddleOCR нет метода ocr")
-                    self.ocr = None
-                    return
-                
-                logger.info("✅ Метод ocr найден, делаем тестовый вызов...")
-                # PaddleOCR 3.x: ocr(img) без аргументов
-                test_result = self.ocr.ocr(test_image)
-                logger.info(f"✅ PaddleOCR тест прошел успешно, результат: {type(test_result)}")
-                
-                # Проверяем что тест действительно нашел текст
-                if test_result and len(test_result) > 0 and test_result[0]:
-                    logger.info(f"✅ Тест найден текст: {len(test_result[0])} областей")
-                    for i, detection in enumerate(test_result[0]):
-                        if len(detection) >= 2 and len(detection[1]) >= 2:
-                            text = detection[1][0]
-                            conf = detection[1][1]
-                            logger.info(f"  - Область {i+1}: '{text}' (уверенность: {conf:.3f})")
-                else:
-                    logger.warning("⚠️ Тест не нашел текст - возможно проблема с настройками")
-                
-            except Exception as test_error:
-                logger.error(f"❌ PaddleOCR тест не прошел: {str(test_error)}")
-                logger.error(f"💡 Тип ошибки теста: {type(test_error).__name__}")
-                logger.error(f"🔍 Детали теста: {repr(test_error)}")
+            # Проверяем что у объекта есть метод ocr
+            if not callable(getattr(self.ocr, 'ocr', None)):
+                logger.error("❌ У объекта PaddleOCR нет метода ocr")
                 self.ocr = None
                 return
             
+            # Тестовый прогон — полный холодный инференс (секунды на CPU при каждом старте),
+            # поэтому только по явному запросу: PADDLEOCR_STARTUP_TEST=1
+            if os.getenv("PADDLEOCR_STARTUP_TEST", "").strip().lower() in ("1", "true", "yes"):
+                logger.info("🧪 Тестируем PaddleOCR...")
+                try:
+                    # Создаем тестовое изображение с текстом
+                    test_image = np.full((200, 400, 3), 255, dtype=np.uint8)
+                    # Добавляем простой черный текст
+                    cv2.putText(test_image, "TEST", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+                    logger.info("🖼️ Создано тестовое изображение 200x400 с текстом 'TEST'")
+                    
+                    # PaddleOCR 3.x: ocr(img) без аргументов
+                    test_result = self.ocr.ocr(test_image)
+                    logger.info(f"✅ PaddleOCR тест прошел успешно, результат: {type(test_result)}")
+                    
+                    # Проверяем что тест действительно нашел текст
+                    if test_result and len(test_result) > 0 and test_result[0]:
+                        logger.info(f"✅ Тест найден текст: {len(test_result[0])} областей")
+                        for i, detection in enumerate(test_result[0]):
+                            if len(detection) >= 2 and len(detection[1]) >= 2:
+                                text = detection[1][0]
+                                conf = detection[1][1]
+                                logger.info(f"  - Область {i+1}: '{text}' (уверенность: {conf:.3f})")
+                    else:
+                        logger.warning("⚠️ Тест не нашел текст - возможно проблема с настройками")
+                    
+                except Exception as test_error:
+                    logger.error(f"❌ PaddleOCR тест не прошел: {str(test_error)}")
+                    logger.error(f"💡 Тип ошибки теста: {type(test_error).__name__}")
+                    logger.error(f"🔍 Детали теста: {repr(test_error)}")
+                    self.ocr = None
+                    return
+            else:
+                logger.info("⏭️ Тестовый прогон PaddleOCR пропущен (PADDLEOCR_STARTUP_TEST не задан)")
+                # Прогрев в фоне (OCR_WARMUP, по умолчанию включён): первый настоящий запрос
+                # не платит за ленивую инициализацию предикторов, а старт не ждёт инференса
+                if os.getenv("OCR_WARMUP", "1").strip().lower() in ("1", "true", "yes"):
+                    self._warmup_thread = threading.Thread(target=self._warmup, name="ocr-warmup", daemon=True)
+                    self._warmup_thread.start()
+            
             logger.info("🎉 PaddleOCR полностью инициализирован и готов к работе!")
             
         except Exception as e:
@@ -196,15 +466,72 @@ class PaddleOCRService:
             logger.error(f"💡 Тип ошибки: {type(e).__name__}")
             self.ocr = None
     
+    def _warmup(self) -> None:
+        """Один маленький прогон детекции и распознавания (под общей блокировкой движка)"""
+        ocr_engine = self.ocr
+        if ocr_engine is None:
+            return
+        try:
+            start = time.perf_counter()
+            warmup_image = np.full((64, 256, 3), 255, dtype=np.uint8)
+            cv2.putText(warmup_image, "OCR", (20, 48), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+            self._ocr_batch_now(ocr_engine, [warmup_image])
+            logger.info(f"🔥 PaddleOCR прогрет за {time.perf_counter() - start:.2f} с")
+        except Exception as warmup_error:
+            logger.warning(f"⚠️ Прогрев PaddleOCR не удался: {str(warmup_error)}")
+
+    def _get_cached_result(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Результат из кэша: копируются только верхний словарь и списки — сами регионы
+        (с пикселями) общие и только для чтения, как словари lru_cache-конфигов"""
+        with self._result_cache_lock:
+            result = self._result_cache.get(key)
+            if result is None:
+                return None
+            self._result_cache.move_to_end(key)
+        return self._copy_result_lists(result)
+
+    @staticmethod
+    def _copy_result_lists(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Копия верхнего уровня результата: новые словарь и списки, те же регионы"""
+        return {k: list(v) if isinstance(v, list) else v for k, v in result.items()}
+
+    def _store_cached_result(self, key: Tuple, result: Dict[str, Any]) -> None:
+        """Сохранить результат (регионы не копируются); самые давние записи вытесняются.
+        Вырезанные пиксели областей замораживаются (write=False): они общие для всех попаданий.
+        Срезы-виды копируются — иначе запись в кэше держала бы всё исходное изображение
+        и менялась бы вместе с ним"""
+        for region in result.get('text_regions') or []:
+            pixels = region.get('region')
+            if isinstance(pixels, np.ndarray):
+                if pixels.base is not None:
+                    pixels = pixels.copy()
+                    region['region'] = pixels
+                pixels.setflags(write=False)
+        snapshot = self._copy_result_lists(result)
+        with self._result_cache_lock:
+            self._result_cache[key] = snapshot
+            self._result_cache.move_to_end(key)
+            while len(self._result_cache) > self._result_cache_size:
+                self._result_cache.popitem(last=False)
+
+    def wait_warmup(self, timeout: Optional[float] = None) -> None:
+        """Дождаться фонового прогрева, если он запущен (старт сервера — до приёма трафика)"""
+        warmup_thread = self._warmup_thread
+        if warmup_thread is not None:
+            warmup_thread.join(timeout)
+
     async def analyze_image(self, image: np.ndarray, sensitivity: Optional[str] = None) -> Dict[str, Any]:
         """Алиас для обратной совместимости"""
         return await self.detect_and_analyze_text(image, sensitivity=sensitivity)
     
     async def detect_and_analyze_text(self, image: np.ndarray, sensitivity: Optional[str] = None) -> Dict[str, Any]:
-        """Детекция и анализ текста на изображении"""
-        print("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: detect_and_analyze_text НАЧАЛСЯ")
+        """Детекция и анализ текста на изображении.
+        
+        Словарь результата и его списки принадлежат вызывающему, но словари областей
+        (text_regions / ocr_boxes) могут быть общими с кэшем результатов (OCR_RESULT_CACHE):
+        их нельзя менять на месте, а пиксели области ('region') доступны только для чтения.
+        """
         logger.info("🚀 === НАЧАЛО detect_and_analyze_text ===")
-        print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Изображение: {image.shape}, {image.dtype}")
         logger.info(f"🖼️ Получено изображение: {image.shape}, {image.dtype}")
         
         if not self.ocr:
@@ -218,25 +545,52 @@ class PaddleOCRService:
                 'error': 'PaddleOCR не инициализирован'
             }
         
+        # Пустое или не 2D/3D изображение отклоняем сразу, без передачи в поток executor'а
+        if image.size == 0 or image.ndim not in (2, 3):
+            logger.warning(f"⚠️ Некорректное изображение: {image.shape}")
+            return {
+                'has_text': False,
+                'text_regions': [],
+                'multiple_fonts': False,
+                'confidence': 0.0,
+                'text_content': '',
+                'error': 'Пустое или некорректное изображение'
+            }
+        
         logger.info("✅ PaddleOCR доступен, запускаем анализ...")
         
         try:
             # Запускаем OCR в отдельном потоке
             logger.info("🔄 Запускаем _run_ocr_sync в отдельном потоке...")
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.executor,
-                self._run_ocr_sync,
-                image
-            )
+            loop = asyncio.get_running_loop()
+            cache_key = None
+            if self._result_cache_size:
+                cache_key = await loop.run_in_executor(self._cv_pool, _image_cache_key, image)
+                cached = self._get_cached_result(cache_key)
+                if cached is not None:
+                    logger.info("♻️ Результат OCR взят из кэша (то же изображение)")
+                    return cached
+            self._inflight += 1
+            try:
+                if self._process_pool is not None:
+                    result = await self._run_in_process_pool(image)
+                else:
+                    result = await loop.run_in_executor(
+                        self.executor,
+                        self._run_ocr_sync,
+                        image
+                    )
+            finally:
+                self._inflight -= 1
+            if cache_key is not None and not result.get('error'):
+                self._store_cached_result(cache_key, result)
             logger.info(f"✅ _run_ocr_sync завершен, результат: {type(result)}")
-            logger.info(f"🔍 Результат: {repr(result)}")
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: detect_and_analyze_text завершен, результат: {type(result)}")
+            # Полный repr результата (все регионы вместе с их пикселями) — только в DEBUG и лениво
+            logger.debug("🔍 Результат: %r", result)
             logger.info("🚀 === КОНЕЦ detect_and_analyze_text ===")
             return result
             
         except Exception as e:
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: ОШИБКА в detect_and_analyze_text: {str(e)}")
             logger.error(f"💥 Техническая ошибка PaddleOCR: {str(e)}")
             logger.error(f"💡 Тип ошибки: {type(e).__name__}")
             logger.error(f"🔍 Детали ошибки: {repr(e)}")
@@ -250,6 +604,21 @@ class PaddleOCRService:
                 'error': f"Техническая ошибка OCR: {str(e)}"
             }
     
+    async def _run_in_process_pool(self, image: np.ndarray) -> Dict[str, Any]:
+        """_run_ocr_sync в пуле процессов: пиксели передаются через общую память
+        (одна копия в сегмент), по каналу идут только имя сегмента, форма и dtype."""
+        loop = asyncio.get_running_loop()
+        image = np.ascontiguousarray(image)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+        try:
+            np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+            return await loop.run_in_executor(
+                self._process_pool, _process_worker_run, shm.name, image.shape, image.dtype.str
+            )
+        finally:
+            shm.close()
+            shm.unlink()
+
     def _get_loose_ocr(self):
         """Возвращает основной OCR вместо создания второго экземпляра.
         На некоторых окружениях создание второго объекта может приводить к
@@ -260,287 +629,203 @@ class PaddleOCRService:
         # Используем уже инициализированный основной OCR
         return self.ocr
 
-    def _create_image_variants(self, image: np.ndarray) -> List[np.ndarray]:
-        """Создание 10 самых эффективных вариантов изображения для агрессивного поиска текста"""
-        try:
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image.copy()
-            
-            variants = []
-            
-            # 1. Оригинальное изображение (RGB)
-            variants.append(image.copy())
-            # 1b. Уменьшенная копия до 1536 по длинной стороне (улучшает распознавание крупных баннеров)
-            try:
-                base = image.copy()
-                h0, w0 = (base.shape[:2] if len(base.shape) >= 2 else (0, 0))
-                if min(h0, w0) > 0:
-                    scale = 1536.0 / max(h0, w0)
-                    if scale < 1.0:
-                        new_w = int(w0 * scale)
-                        new_h = int(h0 * scale)
-                        resized_down = cv2.resize(base, (new_w, new_h), interpolation=cv2.INTER_AREA)
-                        variants.append(resized_down)
-            except Exception:
-                pass
-            
-            # 2. Увеличенное изображение (для мелкого текста)
-            try:
-                h, w = gray.shape
-                if min(h, w) < 800:
-                    scale = max(4, 1000 // min(h, w))
-                    if len(image.shape) == 3:
-                        resized = cv2.resize(image, (w * scale, h * scale), interpolation=cv2.INTER_LANCZOS4)
-                    else:
-                        resized_gray = cv2.resize(gray, (w * scale, h * scale), interpolation=cv2.INTER_LANCZOS4)
-                        resized = cv2.cvtColor(resized_gray, cv2.COLOR_GRAY2RGB)
-                    variants.append(resized)
-            except:
-                pass
-
-            # 9b. Black-hat трансформация для акцента на тёмном тексте на светлом фоне
-            try:
-                kernel_bh = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-                blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel_bh)
-                blackhat_rgb = cv2.cvtColor(blackhat, cv2.COLOR_GRAY2RGB)
-                variants.append(blackhat_rgb)
-            except:
-                pass
-            
-            # 3. Экстремальное увеличение для очень мелкого текста
-            try:
-                h, w = gray.shape
-                if min(h, w) < 400:
-                    scale = max(6, 1200 // min(h, w))
-                    if len(image.shape) == 3:
-                        resized_extreme = cv2.resize(image, (w * scale, h * scale), interpolation=cv2.INTER_LANCZOS4)
-                    else:
-                        resized_gray_extreme = cv2.resize(gray, (w * scale, h * scale), interpolation=cv2.INTER_LANCZOS4)
-                        resized_extreme = cv2.cvtColor(resized_gray_extreme, cv2.COLOR_GRAY2RGB)
-                    variants.append(resized_extreme)
-            except:
-                pass
-            
-            # 4. Высокий контраст (умеренный)
-            try:
-                enhanced = cv2.convertScaleAbs(gray, alpha=1.6, beta=10)
-                enhanced_rgb = cv2.cvtColor(enhanced, cv2.COLOR_GRAY2RGB)
-                variants.append(enhanced_rgb)
-            except:
-                pass
-            
-            # 5. CLAHE (адаптивная эквализация)
-            try:
-                clahe = cv2.createCLAHE(clipLimit=5.0, tileGridSize=(8,8))
-                clahe_image = clahe.apply(gray)
-                clahe_rgb = cv2.cvtColor(clahe_image, cv2.COLOR_GRAY2RGB)
-                variants.append(clahe_rgb)
-            except:
-                pass
-            
-            # 6. Адаптивная бинаризация (более мягкие параметры)
-            try:
-                adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 21, 7)
-                adaptive_rgb = cv2.cvtColor(adaptive, cv2.COLOR_GRAY2RGB)
-                variants.append(adaptive_rgb)
-            except:
-                pass
-            
-            # 7. Инверсия (для белого текста на темном фоне) + бинаризация
-            try:
-                inverted = cv2.bitwise_not(gray)
-                inv_bin = cv2.adaptiveThreshold(inverted, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 21, 7)
-                inverted_rgb = cv2.cvtColor(inv_bin, cv2.COLOR_GRAY2RGB)
-                variants.append(inverted_rgb)
-            except:
-                pass
-            
-            # 8. Otsu-бинаризация (умеренная)
-            try:
-                _, extreme_binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                extreme_binary_rgb = cv2.cvtColor(extreme_binary, cv2.COLOR_GRAY2RGB)
-                variants.append(extreme_binary_rgb)
-            except:
-                pass
-            
-            # 9. Комбинированная обработка
-            try:
-                combined = cv2.convertScaleAbs(gray, alpha=2.5, beta=60)
-                combined = cv2.GaussianBlur(combined, (3, 3), 0)
-                combined = cv2.adaptiveThreshold(combined, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 13, 3)
-                combined_rgb = cv2.cvtColor(combined, cv2.COLOR_GRAY2RGB)
-                variants.append(combined_rgb)
-            except:
-                pass
-            
-            # 10. Предобработка для мелких надписей (умеренно)
-            try:
-                h, w = gray.shape
-                if min(h, w) < 500:
-                    scale = 2
-                    large_gray = cv2.resize(gray, (w * scale, h * scale), interpolation=cv2.INTER_LANCZOS4)
-                    clahe = cv2.createCLAHE(clipLimit=8.0, tileGridSize=(8, 8))
-                    enhanced = clahe.apply(large_gray)
-                    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                    binary_rgb = cv2.cvtColor(binary, cv2.COLOR_GRAY2RGB)
-                    variants.append(binary_rgb)
-            except:
-                pass
-
-            # 11. Усиление чёрного тонкого текста: медианный блюр + адаптивный порог + морф.замыкание
-            try:
-                blur = cv2.medianBlur(gray, 3)
-                th = cv2.adaptiveThreshold(blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 31, 5)
-                kernel = np.ones((2, 2), np.uint8)
-                closed = cv2.morphologyEx(th, cv2.MORPH_CLOSE, kernel, iterations=1)
-                closed_rgb = cv2.cvtColor(closed, cv2.COLOR_GRAY2RGB)
-                variants.append(closed_rgb)
-            except:
-                pass
-
-            # 12. Инвертированная Otsu + дилатация для тонких чёрных букв
-            try:
-                _, th_inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-                kernel = np.ones((2, 2), np.uint8)
-                dil = cv2.dilate(th_inv, kernel, iterations=1)
-                dil_rgb = cv2.cvtColor(dil, cv2.COLOR_GRAY2RGB)
-                variants.append(dil_rgb)
-            except:
-                pass
+    def _get_clahe(self, clip_limit: float) -> Any:
+        """CLAHE (тайлы 8x8) с заданным clipLimit: создаётся один раз на поток и переиспользуется"""
+        cache = getattr(self._cv_local, 'clahe', None)
+        if cache is None:
+            cache = self._cv_local.clahe = {}
+        clahe = cache.get(clip_limit)
+        if clahe is None:
+            clahe = cache[clip_limit] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8, 8))
+        return clahe
 
-            # 13. Подавление красных областей (чтобы выделить чёрный текст)
-            try:
-                hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
-                h, s, v = cv2.split(hsv)
-                # Маски красного (две дуги по кругу оттенков)
-                lower_red1 = np.array([0, 80, 40], dtype=np.uint8)
-                upper_red1 = np.array([10, 255, 255], dtype=np.uint8)
-                lower_red2 = np.array([170, 80, 40], dtype=np.uint8)
-                upper_red2 = np.array([180, 255, 255], dtype=np.uint8)
-                mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-                mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-                red_mask = cv2.bitwise_or(mask1, mask2)
-                # Заменяем красные пиксели на белые
-                no_red = image.copy()
-                no_red[red_mask > 0] = [255, 255, 255]
-                variants.append(no_red)
+    @staticmethod
+    def _limit_image_side(image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Уменьшает изображение до max_image_side по длинной стороне (INTER_AREA).
+        Возвращает (изображение, масштаб); масштаб 1.0 — изображение не менялось."""
+        max_image_side = int(get_preprocessing_config().get('max_image_side', 0) or 0)
+        max_side = max(image.shape[:2])
+        if max_image_side <= 0 or max_side <= max_image_side:
+            return image, 1.0
+        scale = max_image_side / max_side
+        resized = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        logger.debug("📐 Изображение уменьшено %s -> %s", image.shape[:2], resized.shape[:2])
+        return resized, scale
 
-                # На результате без красного — дополнительная адаптивная бинаризация
-                no_red_gray = cv2.cvtColor(no_red, cv2.COLOR_RGB2GRAY)
-                nr_th = cv2.adaptiveThreshold(no_red_gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 7)
-                nr_th_rgb = cv2.cvtColor(nr_th, cv2.COLOR_GRAY2RGB)
-                variants.append(nr_th_rgb)
-
-                # Увеличение no_red для тонких подписей + CLAHE + бинаризация (сильный режим)
-                try:
-                    up_scale = 3
-                    h0, w0 = no_red_gray.shape
-                    up = cv2.resize(no_red_gray, (w0 * up_scale, h0 * up_scale), interpolation=cv2.INTER_LANCZOS4)
-                    clahe = cv2.createCLAHE(clipLimit=6.0, tileGridSize=(8, 8))
-                    up_enh = clahe.apply(up)
-                    up_th = cv2.adaptiveThreshold(up_enh, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 41, 5)
-                    up_th_rgb = cv2.cvtColor(up_th, cv2.COLOR_GRAY2RGB)
-                    variants.append(up_th_rgb)
-                except Exception:
-                    pass
-            except:
-                pass
+    @staticmethod
+    def _rescale_region(region: Dict[str, Any], factor: float) -> Dict[str, Any]:
+        """Геометрия области (bbox, границы, размеры) в координатах исходного изображения.
+        Вырезанные пиксели ('region') остаются от уменьшенной копии — метрики по ним
+        (яркость, доля штрихов, насыщенность) от масштаба не зависят."""
+        bbox = region.get('bbox')
+        try:
+            if isinstance(bbox, np.ndarray):
+                bbox = bbox * factor
+            elif isinstance(bbox, (list, tuple)) and bbox:
+                bbox = (np.asarray(bbox, dtype=np.float64) * factor).tolist()
+        except (ValueError, TypeError):
+            pass
+        x_min, y_min, x_max, y_max = (int(round(region[k] * factor))
+                                      for k in ('x_min', 'y_min', 'x_max', 'y_max'))
+        width = x_max - x_min if region['width'] else 0
+        height = y_max - y_min if region['height'] else 0
+        return dict(region, bbox=bbox, x_min=x_min, y_min=y_min, x_max=x_max, y_max=y_max,
+                    width=width, height=height, area=width * height,
+                    font_size_estimate=height * 0.7)
 
-            # 14. Маска «только тёмные пиксели» + закрытие
-            try:
-                dark = (gray < 160).astype(np.uint8) * 255
-                kernel = np.ones((2, 2), np.uint8)
-                dark_closed = cv2.morphologyEx(dark, cv2.MORPH_CLOSE, kernel, iterations=1)
-                dark_closed_rgb = cv2.cvtColor(dark_closed, cv2.COLOR_GRAY2RGB)
-                variants.append(dark_closed_rgb)
-            except:
-                pass
+    @staticmethod
+    def _pad_to_32(image: np.ndarray) -> np.ndarray:
+        """Добивает изображение справа и снизу (BORDER_REPLICATE) до размеров, кратных 32.
+        Детектор DB работает с кратными 32 сторонами; координаты исходных пикселей не меняются."""
+        h, w = image.shape[:2]
+        pad_h = -h % 32
+        pad_w = -w % 32
+        if not pad_h and not pad_w:
+            return image
+        return cv2.copyMakeBorder(image, 0, pad_h, 0, pad_w, cv2.BORDER_REPLICATE)
 
-            # 15. Unsharp mask для усиления тонких штрихов
-            try:
-                blur = cv2.GaussianBlur(image, (0, 0), sigmaX=1.2)
-                unsharp = cv2.addWeighted(image, 1.6, blur, -0.6, 0)
-                variants.append(unsharp)
-            except:
-                pass
-            
-            logger.info(f"✅ Создано {len(variants)} вариантов для OCR")
-            return variants
-            
+    def _iter_image_variants(self, image: np.ndarray, allow_upscale: bool = True) -> Iterator[np.ndarray]:
+        """Ленивая генерация минимального набора вариантов изображения для поиска текста.
+        
+        Набор: оригинал, CLAHE, инверсия и увеличение для мелких изображений. Контраст,
+        бинаризации, морфология и размытие затрагивали то же распределение яркости, что и
+        CLAHE, и почти не добавляли находок, а каждый вариант — это полный проход OCR.
+        Варианты отдаются по возрастанию стоимости, апскейл — последним: вызывающий код может
+        прекратить чтение после уверенного результата. yield всегда вне try/except, чтобы не
+        перехватывать GeneratorExit при досрочном закрытии генератора.
+        image — BGR (или серое); цветные варианты отдаются в BGR, серые — видами _gray_to_rgb_view.
+        allow_upscale=False отключает увеличение (изображение уже было уменьшено).
+        """
+        try:
+            if len(image.shape) == 3:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            else:
+                # Серый только читается (CLAHE/инверсия/ресайз пишут в новые буферы) — копия не нужна
+                gray = image
+            h, w = gray.shape
         except Exception as e:
             logger.error(f"Ошибка создания вариантов: {str(e)}")
-            return [image.copy()]
+            yield image
+            return
+        
+        # Дешёвые варианты независимы: запускаем их построение в общем пуле сразу,
+        # пока потребитель забирает оригинал (CLAHE-объекты кэшируются по потокам пула)
+        # 2. CLAHE (адаптивная эквализация)
+        clahe_future = self._cv_pool.submit(lambda: self._get_clahe(5.0).apply(gray))
+        # 3. Инверсия (для белого текста на тёмном фоне)
+        inverted_future = self._cv_pool.submit(cv2.bitwise_not, gray)
+        
+        # 1. Оригинальное изображение (BGR) — без копии: OCR-путь вход не изменяет
+        yield image
+        
+        for future in (clahe_future, inverted_future):
+            variant = None
+            try:
+                variant = _gray_to_rgb_view(future.result())
+            except Exception:
+                pass
+            if variant is not None:
+                yield variant
+        
+        # 4. Увеличенное изображение (для мелкого текста) — самый дорогой вариант, последним.
+        # INTER_LINEAR: для CNN-детектора разница с LANCZOS4 несущественна, а ресайз в ~15 раз быстрее
+        if not allow_upscale:
+            return
+        variant = None
+        try:
+            if min(h, w) < 800:
+                scale = max(4, 1000 // min(h, w))
+                if len(image.shape) == 3:
+                    variant = cv2.resize(image, (w * scale, h * scale), interpolation=cv2.INTER_LINEAR)
+                else:
+                    resized_gray = cv2.resize(gray, (w * scale, h * scale), interpolation=cv2.INTER_LINEAR)
+                    variant = _gray_to_rgb_view(resized_gray)
+        except Exception:
+            pass
+        if variant is not None:
+            yield variant
     
     def _run_ocr_sync(self, image: np.ndarray) -> Dict[str, Any]:
         """Синхронный запуск OCR с максимально агрессивными настройками"""
-        print("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: _run_ocr_sync НАЧАЛСЯ")
-        logger.info("🚀 === НАЧАЛО _run_ocr_sync ===")
         try:
-            print("🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Запуск PaddleOCR анализа...")
-            logger.info("🔍 Запуск PaddleOCR анализа...")
-            logger.info(f"🖼️ Размер изображения: {image.shape}")
-            logger.info(f"🖼️ Тип данных изображения: {image.dtype}")
-            logger.info(f"🖼️ Диапазон значений пикселей: [{image.min()}, {image.max()}]")
-            
-            # Создаем варианты изображения
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Создаем варианты изображения...")
-            image_variants = self._create_image_variants(image)
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Создано {len(image_variants)} вариантов")
-            logger.info(f"🔄 Создано {len(image_variants)} вариантов изображения")
+            # Диагностика входа только в DEBUG: min/max — полный проход по пикселям
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🖼️ Изображение: %s, %s, диапазон [%s, %s]", image.shape, image.dtype, image.min(), image.max())
+            
+            # Крупные изображения один раз уменьшаем: детектор всё равно работает с ~960px,
+            # а все варианты ниже строятся уже по уменьшенной копии
+            image, scale = self._limit_image_side(image)
+            # Уменьшенное изображение увеличивать обратно нет смысла — кроме узких баннеров
+            allow_upscale = scale == 1.0 or min(image.shape[:2]) < 400
+            
+            # Варианты изображения строятся лениво: дорогие апскейлы — только если дойдёт очередь.
+            # Источник вариантов один раз добиваем до кратности 32 (все варианты наследуют форму,
+            # апскейл — целочисленный) и один раз переводим в BGR, который ожидает PaddleOCR:
+            # дальше все варианты (в том числе апскейл) строятся уже в BGR без перестановок каналов.
+            # Области текста вырезаются из исходного RGB image
+            variant_source = self._pad_to_32(image)
+            if variant_source.ndim == 3 and variant_source.shape[2] == 3:
+                variant_source = cv2.cvtColor(variant_source, cv2.COLOR_RGB2BGR)
+            image_variants = self._iter_image_variants(variant_source, allow_upscale)
             
             # Собираем ВСЕ найденные тексты из всех вариантов за один проход
             all_texts = []
             all_bboxes = []
             all_confidences = []
             
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: === СБОР ТЕКСТОВ ИЗ ВСЕХ ВАРИАНТОВ ===")
-            
-            for i, variant in enumerate(image_variants):
-                try:
-                    print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Обрабатываем вариант #{i+1}/{len(image_variants)}")
-                    logger.info(f"🔍 Попытка OCR #{i+1}/{len(image_variants)}")
-                    logger.info(f"  - Размер варианта: {variant.shape}")
-                    
-                    # Вызываем PaddleOCR
-                    print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Вариант #{i+1}: вызываем PaddleOCR.ocr()...")
-                    # PaddleOCR ожидает изображение в BGR (как из cv2.imread)
-                    variant_input = variant
-                    try:
-                        if isinstance(variant, np.ndarray) and len(variant.shape) == 3 and variant.shape[2] == 3:
-                            # наши варианты, как правило, в RGB → конвертируем в BGR
-                            variant_input = cv2.cvtColor(variant, cv2.COLOR_RGB2BGR)
-                    except Exception:
-                        variant_input = variant
-                    # PaddleOCR 3.x: ocr(img) без дополнительных аргументов
-                    variant_result = self.ocr.ocr(variant_input)
-                    
-                    print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Вариант #{i+1}: PaddleOCR вернул: {type(variant_result)}")
-                    logger.info(f"🔍 Вариант #{i+1}: результат PaddleOCR: {type(variant_result)}")
-                    
+            # Два этапа: сначала дешёвые варианты (список упорядочен по числу пикселей),
+            # и если они уже дали уверенный результат — дорогие (апскейлы и пр.) пропускаем
+            quality_config = get_text_quality_config()
+            early_exit_conf = float(quality_config.get('early_exit_confidence', 0.85))
+            first_stage = max(1, int(quality_config.get('early_exit_variants', 3)))
+            stages = [(0, first_stage), (first_stage, None)]
+            
+            # Движки с раздельной детекцией (PaddleOCR 2.x: ocr(rec=False)): в первом этапе детектор
+            # гоняем только по вариантам исходного масштаба (их bbox ложатся на image без пересчёта),
+            # а полный det+rec — по варианту с наибольшим числом строк. Дорогие варианты (апскейл)
+            # по-прежнему строятся лениво и распознаются только если не сработал ранний выход
+            if quality_config.get('detector_first_pass', True) and self._det_only_supported:
+                first_variants = list(islice(image_variants, first_stage))
+                same_scale = [v for v in first_variants if v.shape[:2] == variant_source.shape[:2]]
+                box_counts = self._detect_boxes_only([self._to_engine_input(v) for v in same_scale])
+                if box_counts:
+                    best = max(range(len(box_counts)), key=box_counts.__getitem__)
+                    logger.debug("🎯 Детектор: строк по вариантам %s, распознаём вариант #%d", box_counts, best + 1)
+                    first_variants = [same_scale[best]] + [v for v in first_variants
+                                                           if v.shape[:2] != variant_source.shape[:2]]
+                image_variants = chain(first_variants, image_variants)
+                stages = [(0, len(first_variants)), (len(first_variants), None)]
+            
+            for offset, stage_end in stages:
+                stage_variants = list(islice(image_variants, stage_end - offset if stage_end else None))
+                if not stage_variants:
+                    continue
+                variant_inputs = [self._to_engine_input(v) for v in stage_variants]
+                
+                # Все варианты этапа — одним пакетным вызовом движка (детекция/распознавание батчами)
+                logger.debug("🔍 Пакетный OCR по вариантам #%d-%d", offset + 1, offset + len(variant_inputs))
+                stage_start = len(all_confidences)
+                for i, variant_result in enumerate(self._ocr_batch(self.ocr, variant_inputs), start=offset):
                     # НОРМАЛИЗУЕМ РЕЗУЛЬТАТ ПОД ВСЕ СИГНАТУРЫ
                     parsed = self._normalize_ocr_result(variant_result)
                     if not parsed:
-                        print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Вариант #{i+1}: распознанных строк нет")
-                    for j, item in enumerate(parsed):
-                        try:
-                            text = str(item.get('text', '')).strip()
-                            conf = float(item.get('confidence', 0.0))
-                            bbox = item.get('bbox', [[0,0],[100,0],[100,100],[0,100]])
-                            if text and conf > 0:
-                                all_texts.append(text)
-                                all_bboxes.append(bbox)
-                                all_confidences.append(conf)
-                                logger.info(f"🔍 Вариант #{i+1}: добавлен текст '{text}' (уверенность: {conf:.3f})")
-                        except Exception as detection_error:
-                            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: ОШИБКА при обработке детекции #{j+1}: {str(detection_error)}")
-                            continue
-                        
-                except Exception as e:
-                    print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: ОШИБКА обработки варианта #{i+1}: {str(e)}")
-                    logger.warning(f"⚠️ Ошибка обработки варианта #{i+1}: {str(e)}")
-                    continue
+                        logger.debug(f"Вариант #{i+1}: распознанных строк нет")
+                    # _normalize_ocr_result уже гарантирует типы полей: str / float / bbox
+                    for item in parsed:
+                        text = item['text'].strip()
+                        conf = item['confidence']
+                        if text and conf > 0:
+                            all_texts.append(text)
+                            all_bboxes.append(item['bbox'])
+                            all_confidences.append(conf)
+                
+                # Средняя уверенность первого этапа: до него списки пусты, поэтому это среднее
+                # всего all_confidences — без среза-копии и без промежуточного массива (строк десятки)
+                if offset == 0 and len(all_confidences) > stage_start:
+                    stage_mean = fmean(all_confidences)
+                    if stage_mean >= early_exit_conf:
+                        logger.debug("⏩ Уверенность %.2f >= %s — остальные варианты пропускаем", stage_mean, early_exit_conf)
+                        break
             
             # ДОПОЛНИТЕЛЬНЫЙ ПРОХОД временно отключён для ускорения первого ответа
             # try:
@@ -555,101 +840,55 @@ class PaddleOCRService:
 
             # Убираем дубликаты, оставляя лучшую уверенность для каждого уникального текста
             unique_texts = {}
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: === ОБЪЕДИНЕНИЕ РЕЗУЛЬТАТОВ ===")
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: all_texts: {all_texts}")
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: all_bboxes: {all_bboxes}")
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: all_confidences: {all_confidences}")
+            for text, bbox, conf in zip(all_texts, all_bboxes, all_confidences):
+                if text not in unique_texts or conf > unique_texts[text]['confidence']:
+                    unique_texts[text] = {'bbox': bbox, 'confidence': conf}
             
-            for i, (text, bbox, conf) in enumerate(zip(all_texts, all_bboxes, all_confidences)):
-                print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Обрабатываем элемент #{i+1}: text='{text}', bbox={repr(bbox)}, conf={conf}")
-                try:
-                    if text not in unique_texts or conf > unique_texts[text]['confidence']:
-                        unique_texts[text] = {'bbox': bbox, 'confidence': conf}
-                        print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Добавлен/обновлен: '{text}' -> уверенность {conf:.3f}")
-                except Exception as e:
-                    print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: ОШИБКА при обработке элемента #{i+1}: {str(e)}")
-                    logger.error(f"❌ Ошибка при обработке элемента #{i+1}: {str(e)}")
-                    continue
+            logger.debug("✅ Собрано %d уникальных текстов из всех вариантов", len(unique_texts))
             
-            logger.info(f"✅ Собрано {len(unique_texts)} уникальных текстов из всех вариантов")
-            
-            # Детальное логирование уникальных текстов
-            for i, (text, info) in enumerate(unique_texts.items()):
-                logger.info(f"  📝 Текст #{i+1}: '{text}' (уверенность: {info['confidence']:.3f})")
-                print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Уникальный текст #{i+1}: '{text}' (уверенность: {info['confidence']:.3f})")
+            # Детальное логирование уникальных текстов — одной записью и только в DEBUG
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("\n".join(
+                    f"  📝 Текст #{i+1}: '{text}' (уверенность: {info['confidence']:.3f})"
+                    for i, (text, info) in enumerate(unique_texts.items())
+                ))
             
             # Создаем объединенный результат (или пустой список для дальнейшей диагностики)
             if len(unique_texts) == 0:
-                logger.info("ℹ️ OCR не выделил уникальные строки, продолжаем с пустым результатом для диагностики")
+                logger.debug("ℹ️ OCR не выделил уникальные строки, продолжаем с пустым результатом для диагностики")
                 ocr_result = []
             else:
                 ocr_result = [[unique_texts[text]['bbox'], [text, unique_texts[text]['confidence']]] 
                              for text in unique_texts.keys()]
             
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: === ИТОГОВЫЙ ОБЪЕДИНЕННЫЙ РЕЗУЛЬТАТ ===")
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Всего уникальных текстов: {len(unique_texts)}")
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: ocr_result содержит {len(ocr_result)} элементов")
-            
             # Обрабатываем результат (итерация по строкам)
-            logger.info(f"🔍 Обрабатываем финальный результат: элементов={len(ocr_result)}")
-            text_regions = []
-            all_text = []
-            confidences = []
-            
-            for i, line in enumerate(ocr_result):
-                try:
-                    if isinstance(line, dict):
-                        # Не ожидается после унификации, оставлено для совместимости
-                        text = str(line.get('text', '')).strip()
-                        confidence = float(line.get('confidence', 0.0))
-                        bbox = line.get('bbox', [[0, 0], [100, 0], [100, 100], [0, 100]])
-                    elif isinstance(line, (list, tuple)) and len(line) >= 2:
-                        bbox = line[0]
-                        text_info = line[1]
-                        if isinstance(text_info, (list, tuple)) and len(text_info) >= 2:
-                            text = str(text_info[0])
-                            confidence = float(text_info[1])
-                        elif isinstance(text_info, str):
-                            text = text_info
-                            confidence = 1.0
-                        else:
-                            continue
-                    else:
-                        continue
-                    if not text:
-                        continue
-                    region_info = self._analyze_text_region(image, bbox, text, confidence)
-                    text_regions.append(region_info)
-                    all_text.append(text)
-                    confidences.append(confidence)
-                except Exception as parse_err:
-                    logger.warning(f"⚠️ Ошибка разбора строки #{i+1}: {str(parse_err)}")
-                    continue
+            # Строки собраны выше из уже нормализованных данных (непустой str, float),
+            # а _analyze_text_region сам перехватывает ошибки — ни одна строка не отбрасывается,
+            # поэтому размер всех коллекций известен заранее: строим их сразу нужной длины
+            n_lines = len(ocr_result)
+            # Границы всех bbox считаем одним векторным проходом по массиву (N, 4, 2)
+            extents = self._bbox_extents([bbox for bbox, _ in ocr_result])
+            if extents is None:
+                extents = [None] * n_lines
+            text_regions = [
+                self._analyze_text_region(image, bbox, text, confidence, coords)
+                for (bbox, (text, confidence)), coords in zip(ocr_result, extents)
+            ]
+            all_text = list(unique_texts)
             
             # Статистика и проверка качества
-            avg_confidence = np.mean(confidences) if confidences else 0.0
+            confs_arr = np.fromiter(
+                (info['confidence'] for info in unique_texts.values()), dtype=np.float64, count=n_lines
+            )
+            avg_confidence = float(confs_arr.mean()) if confs_arr.size else 0.0
             text_content = ' '.join(all_text)
             
-            # Получаем конфигурацию качества текста
-            quality_config = get_text_quality_config()
+            min_conf = quality_config['min_confidence']
             
-            # Улучшенная проверка качества текста (не роняемся при пустых bbox)
-            valid_regions = []
-            for r in text_regions:
-                try:
-                    if r.get('confidence', 0) >= quality_config['min_confidence']:
-                        valid_regions.append(r)
-                except Exception:
-                    continue
-            clean_text = ''.join(c for c in text_content if c.isalnum() or c.isspace()).strip()
-            
-            # ДЕТАЛЬНАЯ ДИАГНОСТИКА ПРОВЕРКИ КАЧЕСТВА
-            logger.info(f"=== ДИАГНОСТИКА КАЧЕСТВА ТЕКСТА ===")
-            logger.info(f"Всего областей: {len(text_regions)}")
-            logger.info(f"Валидных областей: {len(valid_regions)}")
-            logger.info(f"Чистый текст: '{clean_text}' (длина: {len(clean_text)})")
-            logger.info(f"Средняя уверенность: {avg_confidence:.3f}")
-            logger.info(f"Пороги: min_confidence={quality_config['min_confidence']}, min_text_length={quality_config['min_text_length']}, min_avg_confidence={quality_config['min_avg_confidence']}")
+            # Улучшенная проверка качества текста (одно векторное сравнение)
+            valid_regions = [text_regions[i] for i in np.flatnonzero(confs_arr >= min_conf)]
+            # Очистка одним проходом regex-движка вместо посимвольного генератора
+            clean_text = _NON_TEXT_RE.sub('', text_content).strip()
             
             # Проверяем каждое условие отдельно для лучшей диагностики
             cond1 = len(valid_regions) >= quality_config.get('min_regions_count', 1)
@@ -657,36 +896,29 @@ class PaddleOCRService:
             cond3 = avg_confidence >= quality_config['min_avg_confidence']
             cond4 = len(text_regions) > 0  # Базовая проверка наличия областей
             
-            logger.info(f"Условие 1 (валидные области >= {quality_config.get('min_regions_count', 1)}): {cond1}")
-            logger.info(f"Условие 2 (длина текста >= {quality_config['min_text_length']}): {cond2}")
-            logger.info(f"Условие 3 (средняя уверенность >= {quality_config['min_avg_confidence']}): {cond3}")
-            logger.info(f"Условие 4 (есть области текста): {cond4}")
-            
-            # Детали по каждой области для отладки
-            for i, region in enumerate(text_regions):
-                conf = region.get('confidence', 0)
-                text = region.get('text', '')
-                logger.info(f"Область #{i+1}: '{text}' confidence={conf:.3f}, проходит порог={conf >= quality_config['min_confidence']}")
-            
             # Жесткая проверка наличия текста: должны сойтись базовые условия И достаточное количество букв
             # Опираемся на конфиг качества
             try:
                 min_letters = int(quality_config.get('min_letters_count', 3))
             except Exception:
                 min_letters = 3
-            letters_count = sum(1 for c in clean_text if c.isalpha())
+            letters_count = sum(map(str.isalpha, clean_text))
             has_text = cond4 and cond1 and cond2 and cond3 and letters_count >= min_letters
             
-            logger.info(f"ИТОГОВЫЙ РЕЗУЛЬТАТ has_text = {has_text}")
-            
-            logger.info(f"🔍 Проверка качества: всего областей={len(text_regions)}, валидных={len(valid_regions)}")
-            logger.info(f"📝 Чистый текст: '{clean_text[:50]}' (длина: {len(clean_text)})")
-            logger.info(f"📊 Средняя уверенность: {avg_confidence:.2f}")
-            logger.info(f"✅ Результат проверки: has_text={has_text} (letters={letters_count})")
+            # ДЕТАЛЬНАЯ ДИАГНОСТИКА ПРОВЕРКИ КАЧЕСТВА — одной записью и только в DEBUG
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("\n".join([
+                    "=== ДИАГНОСТИКА КАЧЕСТВА ТЕКСТА ===",
+                    f"Областей: {len(text_regions)}, валидных: {len(valid_regions)}",
+                    f"Чистый текст: '{clean_text}' (длина: {len(clean_text)}, букв: {letters_count})",
+                    f"Средняя уверенность: {avg_confidence:.3f}",
+                    f"Пороги: min_confidence={quality_config['min_confidence']}, min_text_length={quality_config['min_text_length']}, min_avg_confidence={quality_config['min_avg_confidence']}",
+                    f"Условия: регионы={cond1}, длина={cond2}, уверенность={cond3}, есть области={cond4}",
+                    *(f"#{i+1} '{r['text']}' c={r['confidence']:.2f}" for i, r in enumerate(text_regions)),
+                ]))
             
             # ДЕТАЛЬНАЯ ДИАГНОСТИКА МНОЖЕСТВЕННЫХ ШРИФТОВ
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: === ДИАГНОСТИКА МНОЖЕСТВЕННЫХ ШРИФТОВ ===")
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Анализируем {len(text_regions)} областей текста...")
+            logger.debug("=== ДИАГНОСТИКА МНОЖЕСТВЕННЫХ ШРИФТОВ: %d областей ===", len(text_regions))
             
             # Определяем множественные шрифты
             # Читаем конфиг чувствительности
@@ -694,9 +926,15 @@ class PaddleOCRService:
                 cfg = get_multiple_fonts_config(mode=sensitivity) if sensitivity else get_multiple_fonts_config()
             except Exception:
                 cfg = get_multiple_fonts_config()
-            multiple_fonts = self._detect_multiple_fonts_from_regions(text_regions)
-            
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: Результат анализа множественных шрифтов: {multiple_fonts}")
+            # После уменьшения геометрию областей возвращаем в координаты загруженного изображения:
+            # абсолютные пороги (высота > 8, площадь > 100 и т.п.) здесь и в FontAnalyzer рассчитаны
+            # на исходные пиксели. Серый всей страницы тогда не подходит для срезов по этим
+            # координатам, поэтому метрики считаются по вырезанным областям
+            if scale != 1.0:
+                text_regions = [self._rescale_region(r, 1.0 / scale) for r in text_regions]
+            multiple_fonts = self._detect_multiple_fonts_from_regions(
+                text_regions, image if scale == 1.0 else None
+            )
             
             # Формируем результат
             result = {
@@ -710,14 +948,11 @@ class PaddleOCRService:
                 'error': None if has_text else "OCR нашел текст, но он не прошел проверку качества"
             }
             
-            logger.info(f"✅ PaddleOCR результат: has_text={has_text}, текст='{text_content[:50]}...'")
-            logger.info(f"🔤 Результат множественных шрифтов: {multiple_fonts}")
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: _run_ocr_sync завершен, has_text={has_text}, multiple_fonts={multiple_fonts}")
-            logger.info("🚀 === КОНЕЦ _run_ocr_sync ===")
+            logger.info("✅ PaddleOCR результат: has_text=%s, multiple_fonts=%s, областей=%d, текст='%s...'",
+                        has_text, multiple_fonts, len(text_regions), text_content[:50])
             return result
             
         except Exception as e:
-            print(f"🚀 ПРИНУДИТЕЛЬНЫЙ ВЫВОД: ОШИБКА в _run_ocr_sync: {str(e)}")
             logger.error(f"💥 Техническая ошибка в _run_ocr_sync: {str(e)}")
             logger.error(f"💡 Тип ошибки: {type(e).__name__}")
             logger.error(f"🔍 Детали ошибки: {repr(e)}")
@@ -732,123 +967,262 @@ class PaddleOCRService:
         bboxes: List[List[List[int]]] = []
         confs: List[float] = []
 
-        # 1) Убираем красный, чтобы не мешал
+        # 1) Убираем красный, чтобы не мешал (сдвиг тона -> один inRange вместо двух + OR)
         try:
             hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
-            lower_red1 = np.array([0, 80, 40], dtype=np.uint8)
-            upper_red1 = np.array([10, 255, 255], dtype=np.uint8)
-            lower_red2 = np.array([170, 80, 40], dtype=np.uint8)
-            upper_red2 = np.array([180, 255, 255], dtype=np.uint8)
-            mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-            mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-            red_mask = cv2.bitwise_or(mask1, mask2)
-            no_red = image.copy()
-            no_red[red_mask > 0] = [255, 255, 255]
+            hsv_shift = cv2.LUT(hsv, _RED_HUE_SHIFT_LUT)
+            red_mask = cv2.inRange(hsv_shift, _RED_SHIFTED_LOWER, _RED_SHIFTED_UPPER)
+            if cv2.countNonZero(red_mask) > 0:
+                no_red = image.copy()
+                no_red[red_mask > 0] = [255, 255, 255]
+            else:
+                # Красного нет — копия не нужна; no_red дальше только читается
+                no_red = image
         except Exception:
-            no_red = image.copy()
+            no_red = image
 
         gray = cv2.cvtColor(no_red, cv2.COLOR_RGB2GRAY)
 
         # 2) Сильное усиление чёрного
-        clahe = cv2.createCLAHE(clipLimit=6.0, tileGridSize=(8, 8))
-        enh = clahe.apply(gray)
+        enh = self._get_clahe(6.0).apply(gray)
         th = cv2.adaptiveThreshold(enh, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 41, 5)
-        # Доп. маска K-канала (тёмные пиксели)
+        # Доп. маска K-канала (тёмные пиксели): для тёмного текста K ≈ инвертированный серый,
+        # поэтому переиспользуем уже посчитанный gray вместо редукции по каналам
         try:
-            k_channel = 255 - np.max(no_red, axis=2)
-            k_channel = k_channel.astype(np.uint8)
+            k_channel = cv2.bitwise_not(gray)
             k_blur = cv2.GaussianBlur(k_channel, (3, 3), 0)
             k_th = cv2.adaptiveThreshold(k_blur, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 31, 5)
         except Exception:
             k_th = np.zeros_like(th)
-        # Убираем шум, соединяем символы в полосы (объединённая маска)
-        kernel = np.ones((3, 3), np.uint8)
-        closed = cv2.morphologyEx(th, cv2.MORPH_CLOSE, kernel, iterations=1)
-        closed_k = cv2.morphologyEx(k_th, cv2.MORPH_CLOSE, kernel, iterations=1)
-        line_mask = cv2.bitwise_or(closed, closed_k)
+        # Убираем шум, соединяем символы в полосы (объединённая маска).
+        # th и k_th дальше не нужны, поэтому все шаги пишут в них же через dst= — без новых HxW буферов
+        line_mask = th
+        cv2.morphologyEx(th, cv2.MORPH_CLOSE, self._k3, dst=line_mask, iterations=1)
+        cv2.morphologyEx(k_th, cv2.MORPH_CLOSE, self._k3, dst=k_th, iterations=1)
+        cv2.bitwise_or(line_mask, k_th, dst=line_mask)
         # Усилим горизонтальные линии для более уверенной проекции
         try:
-            h_kernel = np.ones((1, 9), np.uint8)
-            line_mask = cv2.dilate(line_mask, h_kernel, iterations=1)
+            cv2.dilate(line_mask, self._kh9, dst=line_mask, iterations=1)
         except Exception:
             pass
 
         # 3) Горизонтальная проекция для поиска полос
-        proj = np.sum(line_mask > 0, axis=1)
-        h, w = closed.shape
-        line_threshold = max(8, int(0.015 * w))
-        bands: List[Tuple[int, int]] = []
-        in_band = False
-        band_start = 0
-        for y in range(h):
-            if proj[y] >= line_threshold and not in_band:
-                in_band = True
-                band_start = y
-            elif proj[y] < line_threshold and in_band:
-                in_band = False
-                bands.append((band_start, y))
-        if in_band:
-            bands.append((band_start, h - 1))
-
-        # 4) Для каждой полосы получаем кроп, увеличиваем и прогоняем OCR
-        for (y1, y2) in bands:
-            # защитимся от слишком тонких полос
-            if y2 - y1 < 10:
-                continue
-            pad = 4
-            y1p = max(0, y1 - pad)
-            y2p = min(h - 1, y2 + pad)
-            crop_rgb = no_red[y1p:y2p, :, :]
-            if crop_rgb.size == 0:
-                continue
+        # Маска бинарная (0/255): суммируем строки одним проходом OpenCV без bool-временного массива
+        proj = cv2.reduce(line_mask, 1, cv2.REDUCE_SUM, dtype=cv2.CV_32S).ravel()
+        h, w = line_mask.shape
+        line_threshold = 255 * max(8, int(0.015 * w))
+        bands = _scan_bands(proj, line_threshold)
+
+        # 4) Полосы независимы: предобработку кропов (OpenCV отпускает GIL) выполняем параллельно,
+        # а распознавание — одним пакетным вызовом OCR-движка для всех полос
+        scale = max(1, int(get_text_quality_config().get('black_text_upscale', 2)))
+        prepared = list(self._cv_pool.map(lambda band: self._prepare_band(no_red, band[0], band[1], scale), bands.tolist()))
+        prepared = [p for p in prepared if p is not None]
+        if not prepared:
+            return texts, bboxes, confs
+
+        ocr_engine = self._get_loose_ocr() or self.ocr
+        try:
+            raw_results = self._ocr_batch(ocr_engine, [crop_bgr for crop_bgr, _, _ in prepared])
+        except Exception as e:
+            logger.warning(f"⚠️ Пакетный OCR полос не удался: {str(e)}")
+            return texts, bboxes, confs
+
+        for (_, y1p, y2p), raw in zip(prepared, raw_results):
+            for text, bbox, conf in self._parse_band_result(raw, y1p, y2p, w, scale):
+                texts.append(text)
+                bboxes.append(bbox)
+                confs.append(conf)
+
+        return texts, bboxes, confs
+
+    def _ocr_batch(self, ocr_engine: Any, images: List[np.ndarray]) -> List[Any]:
+        """Распознавание списка BGR-изображений одним обращением к движку.
+        Вызовы основного движка от одновременных запросов объединяются в общий пакет.
+        Возвращает сырые результаты в формате ocr() — по одному на изображение.
+        """
+        if ocr_engine is self.ocr and self._max_parallel_requests > 1:
+            return self._submit_to_batch(images)
+        return self._ocr_batch_now(ocr_engine, images)
+
+    def _submit_to_batch(self, images: List[np.ndarray]) -> List[Any]:
+        """Общая очередь инференса: первый пришедший поток становится лидером, коротко
+        (OCR_BATCH_WAIT_MS) ждёт изображения других запросов и выполняет один вызов на всех.
+        Пакет уходит раньше, если набралось OCR_MAX_BATCH изображений или в очереди уже все
+        выполняющиеся запросы. Остальные потоки ждут свои результаты. Если других запросов
+        в работе нет — без ожидания.
+        """
+        job: Dict[str, Any] = {'images': images, 'results': None, 'error': None, 'done': False}
+        with self._batch_cond:
+            self._batch_pending.append(job)
+            self._batch_cond.notify_all()
+            if self._batch_leader:
+                while not job['done']:
+                    self._batch_cond.wait()
+                if job['error'] is not None:
+                    raise job['error']
+                return job['results']
+            self._batch_leader = True
+            if self._inflight > 1:
+                # Присоединиться могут только запросы, уже занявшие поток executor'а:
+                # когда все они в очереди, ждать остаток окна незачем
+                expected = min(self._inflight, self._max_parallel_requests)
+                deadline = time.monotonic() + self._batch_wait
+                while (len(self._batch_pending) < expected
+                       and sum(len(j['images']) for j in self._batch_pending) < self._batch_max):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._batch_cond.wait(remaining)
+            jobs, self._batch_pending = self._batch_pending, []
+            self._batch_leader = False
+        # Сам вызов — вне условия: новые запросы тем временем собирают следующий пакет
+        try:
+            flat = [img for j in jobs for img in j['images']]
+            results = self._ocr_batch_now(self.ocr, flat)
+            pos = 0
+            for j in jobs:
+                j['results'] = results[pos:pos + len(j['images'])]
+                pos += len(j['images'])
+        except Exception as e:
+            for j in jobs:
+                j['error'] = e
+        with self._batch_cond:
+            for j in jobs:
+                j['done'] = True
+            self._batch_cond.notify_all()
+        if job['error'] is not None:
+            raise job['error']
+        return job['results']
+
+    @staticmethod
+    def _to_engine_input(variant: np.ndarray) -> np.ndarray:
+        """Подготовка варианта для движка. Варианты уже в BGR (как из cv2.imread — порядок,
+        который ожидает PaddleOCR): материализуются только серые виды с нулевым шагом."""
+        if isinstance(variant, np.ndarray) and variant.ndim == 3 and variant.shape[2] == 3 and variant.strides[2] == 0:
+            # Серый вариант (вид _gray_to_rgb_view): плоскость [:, :, 0] — это общий буфер
+            # серого без копии; GRAY2BGR размножает её SIMD-кодом OpenCV
+            # (в разы быстрее np.ascontiguousarray по виду)
+            return cv2.cvtColor(variant[:, :, 0], cv2.COLOR_GRAY2BGR)
+        return variant
+
+    def _detect_boxes_only(self, images: List[np.ndarray]) -> Optional[List[int]]:
+        """Только детекция (без классификатора и распознавания) по каждому изображению.
+        Возвращает число найденных строк на изображение или None, если движок так не умеет
+        или детекция упала — тогда вызывающий код идёт обычным полным путём.
+        """
+        if not self._det_only_supported or not images:
+            return None
+        counts: List[int] = []
+        try:
+            with self._ocr_lock:
+                for img in images:
+                    res = self.ocr.ocr(img, rec=False, cls=False)
+                    boxes = res[0] if res else None
+                    counts.append(len(boxes) if boxes is not None else 0)
+        except Exception as e:
+            logger.warning(f"⚠️ Детекция без распознавания не удалась: {str(e)}")
+            return None
+        return counts
+
+    def _ocr_batch_now(self, ocr_engine: Any, images: List[np.ndarray]) -> List[Any]:
+        """Непосредственный пакетный вызов движка.
+        PaddleOCR 3.x (predict) принимает список и сам формирует батчи распознавания;
+        2.x со списком при det=True не работает, поэтому там изображения идут по одному.
+        """
+        predict = getattr(ocr_engine, 'predict', None)
+        # Один экземпляр PaddleOCR не потокобезопасен
+        with self._ocr_lock:
+            if callable(predict):
+                try:
+                    return [[page] for page in predict(images)]
+                except Exception as e:
+                    logger.warning(f"⚠️ Пакетный predict не удался, распознаём по одному: {str(e)}")
+            results: List[Any] = []
+            for i, img in enumerate(images):
+                # Ошибка на одном изображении не должна терять результаты остальных
+                try:
+                    results.append(ocr_engine.ocr(img))
+                except Exception as e:
+                    logger.warning(f"⚠️ Ошибка OCR изображения #{i+1}: {str(e)}")
+                    results.append(None)
+            return results
+
+    def _prepare_band(self, no_red: np.ndarray, y1: int, y2: int, scale: int = 2) -> Optional[Tuple[np.ndarray, int, int]]:
+        """Предобработка одной горизонтальной полосы для _detect_black_text_lines.
+        Кроп увеличивается в scale раз (INTER_CUBIC) и бинаризуется по L-каналу.
+        Возвращает (crop_bgr, y1p, y2p) или None, если полоса слишком тонкая.
+        """
+        h = no_red.shape[0]
+        # защитимся от слишком тонких полос
+        if y2 - y1 < 10:
+            return None
+        pad = 4
+        y1p = max(0, y1 - pad)
+        y2p = min(h - 1, y2 + pad)
+        crop_rgb = no_red[y1p:y2p, :, :]
+        if crop_rgb.size == 0:
+            return None
+        try:
             # upscale
-            scale = 4
-            crop_up = cv2.resize(crop_rgb, (crop_rgb.shape[1] * scale, crop_rgb.shape[0] * scale), interpolation=cv2.INTER_LANCZOS4)
-            # OCR (BGR)
+            crop_up = cv2.resize(crop_rgb, (crop_rgb.shape[1] * scale, crop_rgb.shape[0] * scale), interpolation=cv2.INTER_CUBIC)
+            # Доп. предобработка: L-канал LAB + адаптивная бинаризация (инверт.)
             try:
-                # Доп. предобработка: L-канал LAB + адаптивная бинаризация (инверт.)
-                try:
-                    lab = cv2.cvtColor(crop_up, cv2.COLOR_RGB2LAB)
-                    l = lab[:, :, 0]
-                    clahe2 = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
-                    l_enh = clahe2.apply(l)
-                    l_th = cv2.adaptiveThreshold(l_enh, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 31, 5)
-                    crop_pre = cv2.cvtColor(l_th, cv2.COLOR_GRAY2RGB)
-                except Exception:
-                    crop_pre = crop_up
-
-                crop_bgr = cv2.cvtColor(crop_pre, cv2.COLOR_RGB2BGR)
-                ocr_engine = self._get_loose_ocr() or self.ocr
-                ocr_res = ocr_engine.ocr(crop_bgr)
-                parsed = self._normalize_ocr_result(ocr_res)
-                # Трансформируем bbox из координат кропа (после апскейла) в координаты исходного изображения
-                for item in parsed:
-                    text = str(item.get('text', '')).strip()
-                    conf = float(item.get('confidence', 0.0))
-                    raw_bbox = item.get('bbox')
-                    try:
-                        transformed_bbox = []
-                        if isinstance(raw_bbox, (list, tuple)) and len(raw_bbox) >= 4 and isinstance(raw_bbox[0], (list, tuple)):
-                            for pt in raw_bbox:
-                                x = int(pt[0] / float(scale))
-                                y = int(pt[1] / float(scale)) + int(y1p)
-                                transformed_bbox.append([x, y])
-                        else:
-                            # аварийно используем границы полосы
-                            transformed_bbox = [[0, y1p], [w - 1, y1p], [w - 1, y2p], [0, y2p]]
-                    except Exception:
-                        transformed_bbox = [[0, y1p], [w - 1, y1p], [w - 1, y2p], [0, y2p]]
-
-                    # Фильтр: кириллица + мягкий порог уверенности + отбрасываем очень короткие токены
-                    has_cyr = any(1040 <= ord(c) <= 1103 for c in text)
-                    if text and len(text) >= 3 and has_cyr and conf >= 0.45:
-                        texts.append(text)
-                        bboxes.append(transformed_bbox)
-                        confs.append(conf)
+                lab = cv2.cvtColor(crop_up, cv2.COLOR_RGB2LAB)
+                l = lab[:, :, 0]
+                # CLAHE — свой экземпляр на поток пула полос
+                l_enh = self._get_clahe(3.0).apply(l)
+                l_th = cv2.adaptiveThreshold(l_enh, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 31, 5)
+                # OCR (BGR): из серого сразу в BGR, без промежуточного RGB
+                return cv2.cvtColor(l_th, cv2.COLOR_GRAY2BGR), y1p, y2p
             except Exception:
+                return cv2.cvtColor(crop_up, cv2.COLOR_RGB2BGR), y1p, y2p
+        except Exception:
+            return None
+
+    def _parse_band_result(self, raw: Any, y1p: int, y2p: int, w: int, scale: int) -> List[Tuple[str, List[List[int]], float]]:
+        """Разбор результата OCR одной полосы.
+        Возвращает список (text, bbox, confidence) в координатах исходного изображения.
+        """
+        found: List[Tuple[str, List[List[int]], float]] = []
+        # Трансформируем bbox из координат кропа (после апскейла) в координаты исходного изображения
+        for item in self._normalize_ocr_result(raw):
+            text = item['text'].strip()
+            conf = item['confidence']
+            # Фильтр: кириллица + мягкий порог уверенности + отбрасываем очень короткие токены
+            if len(text) < 3 or conf < 0.45 or not _CYR_RE.search(text):
                 continue
+            raw_bbox = item['bbox']
+            try:
+                if isinstance(raw_bbox, (list, tuple)) and len(raw_bbox) >= 4 and isinstance(raw_bbox[0], (list, tuple)):
+                    transformed_bbox = [[int(pt[0] / float(scale)), int(pt[1] / float(scale)) + int(y1p)] for pt in raw_bbox]
+                else:
+                    # аварийно используем границы полосы
+                    transformed_bbox = [[0, y1p], [w - 1, y1p], [w - 1, y2p], [0, y2p]]
+            except Exception:
+                transformed_bbox = [[0, y1p], [w - 1, y1p], [w - 1, y2p], [0, y2p]]
+            found.append((text, transformed_bbox, conf))
+        return found
 
-        return texts, bboxes, confs
+    @staticmethod
+    def _bbox_extents(bboxes: List[Any]) -> Optional[List[Tuple[int, int, int, int]]]:
+        """Пакетно считает (x_min, y_min, x_max, y_max) для полигонов одной страницы.
+        
+        Работает только для однородного набора 4-точечных полигонов; для прочих
+        форматов возвращает None, и каждый bbox парсится в _analyze_text_region.
+        """
+        if not bboxes:
+            return None
+        try:
+            pts = np.asarray(bboxes, dtype=np.float32)
+        except (ValueError, TypeError):
+            return None
+        if pts.ndim != 3 or pts.shape[1] != 4 or pts.shape[2] != 2:
+            return None
+        # astype(int32) усекает к нулю так же, как int() в скалярном пути
+        mins = pts.min(axis=1).astype(np.int32)
+        maxs = pts.max(axis=1).astype(np.int32)
+        return list(zip(*(a.tolist() for a in (mins[:, 0], mins[:, 1], maxs[:, 0], maxs[:, 1]))))
 
     def _normalize_ocr_result(self, raw: Any) -> List[Dict[str, Any]]:
         """Приводит результат PaddleOCR (2.x/3.x, разные форматы) к унифицированному виду.
@@ -884,57 +1258,73 @@ class PaddleOCRService:
                 # Альтернативный формат: dict с ключами rec_texts/rec_scores/dt_polys
                 if isinstance(first, dict):
                     rec_texts = first.get('rec_texts', [])
-                    rec_scores = first.get('rec_scores', [])
                     dt_polys = first.get('dt_polys', [])
+                    # Оценки — одним преобразованием в float вместо float() на каждую строку
+                    try:
+                        rec_scores = np.asarray(first.get('rec_scores', []), dtype=np.float64).ravel().tolist()
+                    except (TypeError, ValueError):
+                        rec_scores = []
+                    # Приводим bbox к спискам списков, если пришёл numpy (массивом или списком массивов)
+                    if isinstance(dt_polys, np.ndarray):
+                        dt_polys = dt_polys.tolist()
+                    n_scores = len(rec_scores)
+                    n_polys = len(dt_polys)
                     out: List[Dict[str, Any]] = []
                     for i, text in enumerate(rec_texts):
-                        try:
-                            conf = float(rec_scores[i]) if i < len(rec_scores) else 0.0
-                            bbox = dt_polys[i] if i < len(dt_polys) else [[0,0],[100,0],[100,100],[0,100]]
-                            # Приводим bbox к списку списков, если пришёл numpy
-                            try:
-                                import numpy as _np
-                                if isinstance(bbox, _np.ndarray):
-                                    bbox = bbox.tolist()
-                            except Exception:
-                                pass
-                            out.append({'bbox': bbox, 'text': str(text), 'confidence': conf})
-                        except Exception:
-                            continue
+                        conf = rec_scores[i] if i < n_scores else 0.0
+                        bbox = dt_polys[i] if i < n_polys else [[0,0],[100,0],[100,100],[0,100]]
+                        if isinstance(bbox, np.ndarray):
+                            bbox = bbox.tolist()
+                        out.append({'bbox': bbox, 'text': str(text), 'confidence': conf})
                     return out
             return []
         except Exception:
             return []
     
-    def _analyze_text_region(self, image: np.ndarray, bbox: List, text: str, confidence: float) -> Dict[str, Any]:
-        """Анализ отдельной области текста"""
+    def _analyze_text_region(self, image: np.ndarray, bbox: List, text: str, confidence: float,
+                             coords: Optional[Tuple[int, int, int, int]] = None) -> Dict[str, Any]:
+        """Анализ отдельной области текста
+        
+        coords — заранее посчитанные (x_min, y_min, x_max, y_max); если переданы, bbox не парсится.
+        """
         try:
             # Безопасное извлечение координат
             try:
-                logger.info(f"🔍 Парсим bbox: {repr(bbox)}, тип: {type(bbox)}")
+                logger.debug("🔍 Парсим bbox: %r, тип: %s", bbox, type(bbox))
                 
-                if isinstance(bbox, (list, tuple)) and len(bbox) > 0:
+                if coords is not None:
+                    # Координаты посчитаны пакетно в _bbox_extents
+                    x_min, y_min, x_max, y_max = coords
+                elif isinstance(bbox, np.ndarray) and bbox.ndim == 2 and bbox.shape[0] > 0:
+                    # Формат numpy (N, 2): редукции по осям без промежуточных списков
+                    x_min = int(bbox[:, 0].min())
+                    y_min = int(bbox[:, 1].min())
+                    x_max = int(bbox[:, 0].max())
+                    y_max = int(bbox[:, 1].max())
+                elif isinstance(bbox, (list, tuple)) and len(bbox) > 0:
                     # НОВЫЙ ФОРМАТ: bbox может быть списком координат в разных форматах
                     if isinstance(bbox[0], (list, tuple)):
-                        # Формат: [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-                        points = np.array(bbox, dtype=np.float32)
-                        x_min = int(np.min(points[:, 0]))
-                        y_min = int(np.min(points[:, 1]))
-                        x_max = int(np.max(points[:, 0]))
-                        y_max = int(np.max(points[:, 1]))
-                        logger.info(f"✅ Парсинг bbox: [[x,y], [x,y], [x,y], [x,y]] -> x_min={x_min}, y_min={y_min}, x_max={x_max}, y_max={y_max}")
+                        # Формат: [[x1,y1], [x2,y2], [x3,y3], [x4,y4]] — для 4 точек скалярные
+                        # min/max быстрее, чем создание маленького numpy-массива
+                        xs = [pt[0] for pt in bbox]
+                        ys = [pt[1] for pt in bbox]
+                        x_min = int(min(xs))
+                        y_min = int(min(ys))
+                        x_max = int(max(xs))
+                        y_max = int(max(ys))
+                        logger.debug("✅ Парсинг bbox: [[x,y], [x,y], [x,y], [x,y]] -> x_min=%s, y_min=%s, x_max=%s, y_max=%s", x_min, y_min, x_max, y_max)
                     elif len(bbox) >= 4:
                         # Формат: [x1, y1, x2, y2] или [x1, y1, x2, y2, ...]
                         coords = [float(coord) for coord in bbox[:4]]
                         x_min, y_min, x_max, y_max = map(int, coords)
-                        logger.info(f"✅ Парсинг bbox: [x1, y1, x2, y2] -> x_min={x_min}, y_min={y_min}, x_max={x_max}, y_max={y_max}")
+                        logger.debug("✅ Парсинг bbox: [x1, y1, x2, y2] -> x_min=%s, y_min=%s, x_max=%s, y_max=%s", x_min, y_min, x_max, y_max)
                     elif len(bbox) == 2:
                         # Формат: [x, y] - одна точка, создаем область вокруг неё
                         x_min = int(float(bbox[0])) - 10
                         y_min = int(float(bbox[1])) - 10
                         x_max = int(float(bbox[0])) + 10
                         y_max = int(float(bbox[1])) + 10
-                        logger.info(f"✅ Парсинг bbox: [x, y] -> создаем область вокруг точки: x_min={x_min}, y_min={y_min}, x_max={x_max}, y_max={y_max}")
+                        logger.debug("✅ Парсинг bbox: [x, y] -> создаем область вокруг точки: x_min=%s, y_min=%s, x_max=%s, y_max=%s", x_min, y_min, x_max, y_max)
                     else:
                         # Неизвестный формат, создаем область по умолчанию
                         x_min, y_min, x_max, y_max = 0, 0, 100, 100
@@ -956,7 +1346,7 @@ class PaddleOCRService:
                         y_min, y_max = min(y_min, y_max), max(y_min, y_max)
                         if y_min == y_max:
                             y_max = y_min + 100
-                    logger.info(f"✅ Исправлены координаты: x_min={x_min}, y_min={y_min}, x_max={x_max}, y_max={y_max}")
+                    logger.debug("✅ Исправлены координаты: x_min=%s, y_min=%s, x_max=%s, y_max=%s", x_min, y_min, x_max, y_max)
                     
             except (ValueError, TypeError, IndexError) as e:
                 logger.error(f"❌ Ошибка парсинга bbox {bbox}: {str(e)}")
@@ -964,7 +1354,7 @@ class PaddleOCRService:
                 logger.error(f"🔍 Детали: {repr(e)}")
                 # Создаем область по умолчанию вместо пометки как невалидной
                 x_min, y_min, x_max, y_max = 0, 0, 100, 100
-                logger.info(f"🔄 Используем область по умолчанию: x_min={x_min}, y_min={y_min}, x_max={x_max}, y_max={y_max}")
+                logger.debug("🔄 Используем область по умолчанию: x_min=%s, y_min=%s, x_max=%s, y_max=%s", x_min, y_min, x_max, y_max)
             
             # Извлекаем область изображения
             region = image[y_min:y_max, x_min:x_max]
@@ -1022,53 +1412,97 @@ class PaddleOCRService:
                 'y_max': 0
             }
     
-    def _detect_multiple_fonts_from_regions(self, text_regions: List[Dict]) -> bool:
-        """Робастное определение множественных шрифтов. Менее чувствительно к шуму."""
+    def _detect_multiple_fonts_from_regions(self, text_regions: List[Dict], image: Optional[np.ndarray] = None) -> bool:
+        """Робастное определение множественных шрифтов. Менее чувствительно к шуму.
+        image — исходное RGB-изображение регионов: если передано, серый считается один раз на всю страницу.
+        """
         try:
             logger.info("=== АНАЛИЗ МНОЖЕСТВЕННЫХ ШРИФТОВ (ROBUST) ===")
-            logger.info(f"Всего областей для анализа: {len(text_regions)}")
+            logger.info("Всего областей для анализа: %d", len(text_regions))
 
             if len(text_regions) < 2:
                 logger.info("Областей < 2 — считаем один шрифт")
                 return False
 
             cfg = get_multiple_fonts_config()
+            # Пороги, которые используются в нескольких проверках, читаем один раз
+            h_ratio_thr = float(cfg.get('height_ratio_threshold', 2.0))
+            d_diff_thr = float(cfg.get('density_diff_threshold', 0.12))
 
             # 0) Жёсткая фильтрация шумов
-            filtered: List[Dict[str, Any]] = []
-            for r in text_regions:
-                txt = str(r.get('text', '')).strip()
-                conf = float(r.get('confidence', 0.0))
-                h = float(r.get('height', 0) or 0)
-                w = float(r.get('width', 0) or 0)
-                if len(txt) >= 2 and conf >= 0.7 and h > 8 and w > 8:
-                    filtered.append(r)
-            logger.info(f"После фильтрации осталось регионов: {len(filtered)}")
+            # _analyze_text_region гарантирует числовые width/height/confidence и строковый text
+            filtered: List[Dict[str, Any]] = [
+                r for r in text_regions
+                if r['confidence'] >= 0.7 and r['height'] > 8 and r['width'] > 8 and len(r['text'].strip()) >= 2
+            ]
+            logger.info("После фильтрации осталось регионов: %d", len(filtered))
             if len(filtered) < max(5, int(cfg.get('min_regions_count', 4))):
                 logger.info("Данных мало после фильтрации — один шрифт")
                 return False
 
+            # Признаки регионов собираем один раз в массивы (SoA), дальше — только векторная математика
+            n = len(filtered)
+            H = np.fromiter((r['height'] for r in filtered), dtype=np.float64, count=n)
+            W = np.fromiter((r['width'] for r in filtered), dtype=np.float64, count=n)
+            A = np.fromiter((r['area'] for r in filtered), dtype=np.float64, count=n)
+
             # Удаляем экстремальные по ширине/площади (частая причина ложных срабатываний)
-            try:
-                widths = [float(r.get('width', 0)) for r in filtered if float(r.get('width', 0)) > 0]
-                areas_for_outliers = [float(r.get('area', 0)) for r in filtered if float(r.get('area', 0)) > 0]
-                if widths:
-                    w_med = float(np.median(np.array(widths, dtype=float)))
-                    filtered = [r for r in filtered if float(r.get('width', 0) or 0) <= 2.2 * w_med]
-                if areas_for_outliers:
-                    a_med = float(np.median(np.array(areas_for_outliers, dtype=float)))
-                    filtered = [r for r in filtered if float(r.get('area', 0) or 0) <= 3.0 * a_med]
-                logger.info(f"После удаления аутлаеров по ширине/площади: {len(filtered)} регионов")
-                if len(filtered) < 5:
-                    return False
-            except Exception:
-                pass
+            w_pos = W[W > 0]
+            a_pos = A[A > 0]
+            keep = np.ones(n, dtype=bool)
+            if w_pos.size:
+                keep &= W <= 2.2 * float(np.median(w_pos))
+            if a_pos.size:
+                keep &= A <= 3.0 * float(np.median(a_pos))
+            idx = np.flatnonzero(keep)
+            filtered = [filtered[i] for i in idx]
+            H, W, A = H[idx], W[idx], A[idx]
+            logger.info("После удаления аутлаеров по ширине/площади: %d регионов", len(filtered))
+            if len(filtered) < 5:
+                return False
+
+            # Цветовые метрики региона считаются не более одного раза: их используют
+            # и сравнение кластеров по высоте, и группировка по тексту ниже
+            color_cache: Dict[int, Optional[Tuple[float, float, float]]] = {}
+            # Серый всей страницы — лениво и один раз, регионы берут из него срезы
+            # (при OCR_USE_OPENCL — срезы UMat, пороги считаются на устройстве OpenCL)
+            gray_full: Optional[np.ndarray] = None
+            gray_umat = None
+
+            def _region_gray(r: Dict[str, Any]):
+                nonlocal gray_full, gray_umat
+                if image is None or r.get('region') is None:
+                    return None
+                if gray_full is None:
+                    gray_full = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+                    if self._use_opencl:
+                        gray_umat = cv2.UMat(gray_full)
+                y0, y1, x0, x1 = r['y_min'], r['y_max'], r['x_min'], r['x_max']
+                gh, gw = gray_full.shape
+                if gray_umat is not None and 0 <= y0 < y1 <= gh and 0 <= x0 < x1 <= gw:
+                    return cv2.UMat(gray_umat, (y0, y1), (x0, x1))
+                return gray_full[y0:y1, x0:x1]
+
+            def _fill_color_metrics(ids: List[int]) -> None:
+                """Досчитывает метрики для ещё не посчитанных регионов одним пакетом"""
+                todo = [i for i in ids if i not in color_cache]
+                if not todo:
+                    return
+                try:
+                    regions = [filtered[i].get('region') for i in todo]
+                    grays = [_region_gray(filtered[i]) for i in todo]
+                    if self._use_opencl:
+                        metrics = [self._region_color_metrics(rg, g) for rg, g in zip(regions, grays)]
+                    else:
+                        metrics = self._regions_color_metrics(regions, grays)
+                except Exception:
+                    metrics = [None] * len(todo)
+                color_cache.update(zip(todo, metrics))
 
-            heights = [float(r.get('height', 0)) for r in filtered if float(r.get('height', 0)) > 8]
-            if len(heights) < 2:
+            heights_arr = H[H > 8]
+            if heights_arr.size < 2:
                 return False
 
-            heights_arr = np.array(heights, dtype=float)
             median_h = float(np.median(heights_arr))
             if median_h <= 0:
                 return False
@@ -1076,14 +1510,14 @@ class PaddleOCRService:
             # Ранний «один шрифт»: ≥70% высот в коридоре ±30% от медианы
             in_band = np.logical_and(heights_arr >= 0.7 * median_h, heights_arr <= 1.3 * median_h)
             frac_in_band = float(np.sum(in_band)) / float(len(heights_arr))
-            logger.info(f"Доля высот в [0.7..1.3] от медианы: {frac_in_band:.2f}")
+            logger.info("Доля высот в [0.7..1.3] от медианы: %.2f", frac_in_band)
             likely_one_font = frac_in_band >= float(cfg.get('in_band_frac', 0.75))
 
             # Робастная дисперсия (MAD)
             mad = float(np.median(np.abs(heights_arr - median_h)) + 1e-6)
             robust_std = 1.4826 * mad
             height_variation = robust_std / median_h
-            logger.info(f"Robust variation = {height_variation:.3f}")
+            logger.info("Robust variation = %.3f", height_variation)
 
             # Условие: большая вариация считает множественные шрифты
             if height_variation > max(0.7, float(cfg.get('size_variation_threshold', 0.4)) + 0.3):
@@ -1094,8 +1528,8 @@ class PaddleOCRService:
             h_min = float(np.min(heights_arr))
             h_max = float(np.max(heights_arr))
             ratio = h_max / h_min if h_min > 0 else 1.0
-            logger.info(f"Соотношение высот max/min: {ratio:.2f}")
-            if ratio > float(cfg.get('height_ratio_threshold', 2.0)):
+            logger.info("Соотношение высот max/min: %.2f", ratio)
+            if ratio > h_ratio_thr:
                 # Оценим поддержку кластеров через пороги от медианы
                 small = heights_arr <= 0.85 * median_h
                 large = heights_arr >= 1.15 * median_h
@@ -1109,30 +1543,19 @@ class PaddleOCRService:
                         L_vals = []
                         densities = []
                         sats = []
-                        for idx, rr in enumerate(filtered):
-                            if not mask[idx]:
+                        ids = np.flatnonzero(mask).tolist()
+                        _fill_color_metrics(ids)
+                        for idx in ids:
+                            metrics = color_cache[idx]
+                            if metrics is None:
                                 continue
-                            region_img = rr.get('region', None)
-                            try:
-                                if region_img is None or getattr(region_img, 'size', 0) == 0:
-                                    continue
-                                lab = cv2.cvtColor(region_img, cv2.COLOR_RGB2LAB)
-                                L = float(np.mean(lab[:, :, 0]))
-                                L_vals.append(L)
-                                # Оценка «толщины»: доля тёмных пикселей
-                                gray = cv2.cvtColor(region_img, cv2.COLOR_RGB2GRAY)
-                                _, bin_inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-                                density = float(np.mean(bin_inv == 255))
-                                densities.append(density)
-                                # Оценка насыщенности цвета (отличает чёрный от яркого заголовка)
-                                hsv = cv2.cvtColor(region_img, cv2.COLOR_RGB2HSV)
-                                S = float(np.mean(hsv[:, :, 1]))
-                                sats.append(S)
-                            except Exception:
-                                continue
-                        L_mean = float(np.mean(L_vals)) if L_vals else 0.0
-                        d_mean = float(np.mean(densities)) if densities else 0.0
-                        s_mean = float(np.mean(sats)) if sats else 0.0
+                            L, density, S = metrics
+                            L_vals.append(L)
+                            densities.append(density)
+                            sats.append(S)
+                        L_mean = fmean(L_vals) if L_vals else 0.0
+                        d_mean = fmean(densities) if densities else 0.0
+                        s_mean = fmean(sats) if sats else 0.0
                         return L_mean, d_mean, s_mean
 
                     # Собираем маски индексов под small/large на отфильтрованном списке
@@ -1141,11 +1564,12 @@ class PaddleOCRService:
                     large_mask = large
                     L_small, D_small, S_small = _cluster_metrics(small_mask)
                     L_large, D_large, S_large = _cluster_metrics(large_mask)
-                    logger.info(f"Сравнение кластеров: L_diff={abs(L_large - L_small):.1f}, D_diff={abs(D_large - D_small):.2f}, S_diff={abs(S_large - S_small):.1f}")
+                    logger.info("Сравнение кластеров: L_diff=%.1f, D_diff=%.2f, S_diff=%.1f",
+                                abs(L_large - L_small), abs(D_large - D_small), abs(S_large - S_small))
                     met_diff = 0
                     if abs(S_large - S_small) >= float(cfg.get('saturation_diff_threshold', 20.0)):
                         met_diff += 1
-                    if abs(D_large - D_small) >= float(cfg.get('density_diff_threshold', 0.12)):
+                    if abs(D_large - D_small) >= d_diff_thr:
                         met_diff += 1
                     if abs(L_large - L_small) >= float(cfg.get('brightness_diff_threshold', 12.0)):
                         met_diff += 1
@@ -1154,49 +1578,45 @@ class PaddleOCRService:
                         return True
 
             # Площади как дополнительный критерий (более строгий порог)
-            areas = [float(r.get('area', 0)) for r in filtered if float(r.get('area', 0)) > 100]
-            if len(areas) >= 2:
-                areas_arr = np.array(areas, dtype=float)
+            areas_arr = A[A > 100]
+            if areas_arr.size >= 2:
                 a_ratio = float(np.max(areas_arr)) / float(np.min(areas_arr)) if float(np.min(areas_arr)) > 0 else 1.0
-                logger.info(f"Соотношение площадей max/min: {a_ratio:.2f}")
+                logger.info("Соотношение площадей max/min: %.2f", a_ratio)
                 if a_ratio > float(cfg.get('area_ratio_threshold', 3.5)):
                     logger.info("✅ Очень разные площади — множественные шрифты")
                     return True
 
             # Дополнительная эвристика: группируем по тексту и сравниваем медианные высоты/плотности
             try:
-                from collections import defaultdict
-                groups_h: Dict[str, List[float]] = defaultdict(list)
-                groups_d: Dict[str, List[float]] = defaultdict(list)
-                for r in filtered:
-                    txt = str(r.get('text', '')).strip()
+                # Один словарь: текст -> (высоты, плотности), по одному хеш-поиску на регион
+                groups: Dict[str, Tuple[List[float], List[float]]] = defaultdict(lambda: ([], []))
+                # Мелкие регионы отсекаем до подсчёта цветовых метрик (cvtColor + Otsu)
+                _fill_color_metrics([i for i, r in enumerate(filtered) if H[i] > 8 and r['text'].strip()])
+                for i, r in enumerate(filtered):
+                    txt = r['text'].strip()
                     if not txt:
                         continue
-                    h = float(r.get('height', 0) or 0)
-                    region_img = r.get('region', None)
-                    dens = 0.0
-                    try:
-                        if region_img is not None and getattr(region_img, 'size', 0) > 0:
-                            gray = cv2.cvtColor(region_img, cv2.COLOR_RGB2GRAY)
-                            _, bin_inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-                            dens = float(np.mean(bin_inv == 255))
-                    except Exception:
-                        pass
-                    if h > 8:
-                        groups_h[txt].append(h)
-                        groups_d[txt].append(dens)
-                if len(groups_h) >= 2:
+                    h = float(H[i])
+                    if h <= 8:
+                        continue
+                    metrics = color_cache[i]
+                    dens = metrics[1] if metrics is not None else 0.0
+                    h_list, d_list = groups[txt]
+                    h_list.append(h)
+                    d_list.append(dens)
+                if len(groups) >= 2:
                     # Берём две самые частые строки (обычно заголовок и подзаголовок)
-                    items = sorted(groups_h.items(), key=lambda kv: len(kv[1]), reverse=True)
-                    a_txt, a_vals = items[0][0], items[0][1]
-                    b_txt, b_vals = items[1][0], items[1][1]
-                    a_h, b_h = float(np.median(a_vals)), float(np.median(b_vals))
-                    a_d = float(np.median(groups_d.get(a_txt, [0.0])))
-                    b_d = float(np.median(groups_d.get(b_txt, [0.0])))
+                    items = heapq.nlargest(2, groups.items(), key=lambda kv: len(kv[1][0]))
+                    a_txt, (a_vals, a_dens) = items[0]
+                    b_txt, (b_vals, b_dens) = items[1]
+                    # Списки короткие: statistics.median дешевле, чем создание numpy-массива
+                    a_h, b_h = median(a_vals), median(b_vals)
+                    a_d = median(a_dens)
+                    b_d = median(b_dens)
                     h_ratio = max(a_h, b_h) / max(1.0, min(a_h, b_h))
                     d_diff = abs(a_d - b_d)
-                    logger.info(f"Группы '{a_txt[:12]}...' vs '{b_txt[:12]}...': h_ratio={h_ratio:.2f}, d_diff={d_diff:.2f}")
-                    if h_ratio >= float(cfg.get('height_ratio_threshold', 2.0)) or d_diff >= float(cfg.get('density_diff_threshold', 0.12)):
+                    logger.info("Группы '%s...' vs '%s...': h_ratio=%.2f, d_diff=%.2f", a_txt[:12], b_txt[:12], h_ratio, d_diff)
+                    if h_ratio >= h_ratio_thr or d_diff >= d_diff_thr:
                         logger.info("✅ Различие между самыми частыми строками — множественные шрифты")
                         return True
             except Exception:
@@ -1212,6 +1632,59 @@ class PaddleOCRService:
             logger.error(f"Ошибка определения множественных шрифтов: {str(e)}")
             return False
     
+    def _region_color_metrics(self, region_img: Optional[np.ndarray],
+                              gray: Optional[np.ndarray] = None) -> Optional[Tuple[float, float, float]]:
+        """Цветовые метрики области: (яркость, плотность штрихов, насыщенность).
+        gray — готовый серый срез той же области (если уже посчитан для всей страницы), ndarray или UMat.
+        Возвращает None для пустой области.
+        """
+        if region_img is None or getattr(region_img, 'size', 0) == 0:
+            return None
+        # Яркость — среднее L из LAB: на него откалиброван brightness_diff_threshold
+        # (среднее серого на цветных областях отличается от L на десятки единиц)
+        L = _mean_lab_lightness(region_img)
+        if gray is None:
+            gray = cv2.cvtColor(region_img, cv2.COLOR_RGB2GRAY)
+        # Оценка «толщины»: доля тёмных пикселей
+        _, bin_inv = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        density = cv2.countNonZero(bin_inv) / float(region_img.shape[0] * region_img.shape[1])
+        # Оценка насыщенности цвета (отличает чёрный от яркого заголовка):
+        # S из HSV = (max - min) / max по каналам, без отдельного cvtColor
+        S = _mean_saturation(region_img)
+        return L, density, S
+
+    def _regions_color_metrics(self, regions: List[Optional[np.ndarray]],
+                               grays: List[Optional[np.ndarray]]) -> List[Optional[Tuple[float, float, float]]]:
+        """Пакетный вариант _region_color_metrics для набора областей.
+        По каждой области строится гистограмма серого, а порог Otsu и плотность штрихов
+        считаются векторно по матрице гистограмм (N, 256); яркость — среднее L из LAB.
+        """
+        out: List[Optional[Tuple[float, float, float]]] = [None] * len(regions)
+        idx = [k for k, r in enumerate(regions) if r is not None and getattr(r, 'size', 0) > 0]
+        if not idx:
+            return out
+        hist = np.empty((len(idx), 256), dtype=np.float64)
+        for row, k in enumerate(idx):
+            gray = grays[k] if grays[k] is not None else cv2.cvtColor(regions[k], cv2.COLOR_RGB2GRAY)
+            hist[row] = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        # Otsu как в OpenCV: максимум межклассовой дисперсии (m1 - mu*q1)^2 / (q1*q2),
+        # первый по порядку; уровни с вырожденным классом пропускаются
+        total = hist.sum(axis=1, keepdims=True)
+        q1 = np.cumsum(hist, axis=1) / total
+        m1 = np.cumsum(hist * np.arange(256), axis=1) / total
+        mu = m1[:, -1:]
+        q2 = 1.0 - q1
+        eps = float(np.finfo(np.float32).eps)
+        valid = (np.minimum(q1, q2) >= eps) & (np.maximum(q1, q2) <= 1.0 - eps)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma = np.where(valid, (m1 - mu * q1) ** 2 / (q1 * q2), 0.0)
+        thresh = sigma.argmax(axis=1)
+        # THRESH_BINARY_INV: «тёмные» — пиксели <= порога, их доля и есть плотность
+        density = q1[np.arange(len(idx)), thresh]
+        for row, k in enumerate(idx):
+            out[k] = (_mean_lab_lightness(regions[k]), float(density[row]), _mean_saturation(regions[k]))
+        return out
+
     def _cluster_font_sizes(self, sizes: List[float], threshold: float = 0.3) -> List[List[float]]:
         """Кластеризация размеров шрифтов для выявления групп"""
         if len(sizes) < 2:
@@ -1220,18 +1693,21 @@ class PaddleOCRService:
         sorted_sizes = sorted(sizes)
         clusters = []
         current_cluster = [sorted_sizes[0]]
+        # Среднее кластера ведём через накопленную сумму — O(1) на шаг вместо np.mean по всему кластеру
+        cluster_sum = float(sorted_sizes[0])
         
         for size in sorted_sizes[1:]:
             # Если размер близок к среднему текущего кластера, добавляем в него
-            cluster_mean = np.mean(current_cluster)
-            relative_diff = abs(size - cluster_mean) / cluster_mean
-            
-            if relative_diff <= threshold:
+            cluster_mean = cluster_sum / len(current_cluster)
+            # Нулевое среднее (пустые области) в кластер ничего не принимает
+            if cluster_mean != 0 and abs(size - cluster_mean) / cluster_mean <= threshold:
                 current_cluster.append(size)
+                cluster_sum += size
             else:
                 # Начинаем новый кластер
                 clusters.append(current_cluster)
                 current_cluster = [size]
+                cluster_sum = float(size)
         
         clusters.append(current_cluster)
         return clusters
@@ -1245,31 +1721,45 @@ class PaddleOCRService:
             if len(texts) < 2:
                 return False
             
-            # Анализ стилей текста
-            has_uppercase = any(text.isupper() for text in texts)
-            has_lowercase = any(text.islower() for text in texts)
-            has_mixed_case = any(text[0].isupper() and any(c.islower() for c in text[1:]) for text in texts if len(text) > 1)
-            has_numbers = any(any(c.isdigit() for c in text) for text in texts)
-            
-            # Анализ длин слов
-            word_lengths = []
+            # Анализ стилей текста: один проход по строкам, каждый флаг проверяется, пока не найден;
+            # для ответа достаточно трёх флагов из четырёх — дальше строки не смотрим
+            has_uppercase = has_lowercase = has_mixed_case = has_numbers = False
+            style_variety_score = 0
             for text in texts:
-                words = text.split()
-                if words:
-                    avg_word_len = sum(len(word) for word in words) / len(words)
-                    word_lengths.append(avg_word_len)
+                if not has_uppercase and text.isupper():
+                    has_uppercase = True
+                    style_variety_score += 1
+                if not has_lowercase and text.islower():
+                    has_lowercase = True
+                    style_variety_score += 1
+                # map(str.is*) перебирает символы в C, без генератора на байткоде
+                if not has_mixed_case and len(text) > 1 and text[0].isupper() and any(map(str.islower, text[1:])):
+                    has_mixed_case = True
+                    style_variety_score += 1
+                if not has_numbers and any(map(str.isdigit, text)):
+                    has_numbers = True
+                    style_variety_score += 1
+                if style_variety_score >= 3:
+                    break
             
             # Если есть существенные различия в стилях или длинах слов
-            style_variety_score = sum([has_uppercase, has_lowercase, has_mixed_case, has_numbers])
-            
             if style_variety_score >= 3:  # Много разных стилей
-                logger.info(f"Обнаружено разнообразие стилей текста: uppercase={has_uppercase}, lowercase={has_lowercase}, mixed={has_mixed_case}, numbers={has_numbers}")
+                logger.info("Обнаружено разнообразие стилей текста: uppercase=%s, lowercase=%s, mixed=%s, numbers=%s",
+                            has_uppercase, has_lowercase, has_mixed_case, has_numbers)
                 return True
             
-            if len(word_lengths) >= 2:
-                word_len_variation = np.std(word_lengths) / np.mean(word_lengths) if np.mean(word_lengths) > 0 else 0
+            # Анализ длин слов — только если стилей недостаточно; средние длины сразу
+            # складываем в непрерывный float64-массив (каждая строка разбивается один раз)
+            word_lengths = np.fromiter(
+                (sum(map(len, words)) / len(words) for words in map(str.split, texts) if words),
+                dtype=np.float64,
+            )
+            
+            if word_lengths.size >= 2:
+                mean_len = float(word_lengths.mean())
+                word_len_variation = float(word_lengths.std()) / mean_len if mean_len > 0 else 0
                 if word_len_variation > 0.5:  # Большая вариация в длинах слов
-                    logger.info(f"Обнаружена большая вариация в длинах слов: {word_len_variation:.3f}")
+                    logger.info("Обнаружена большая вариация в длинах слов: %.3f", word_len_variation)
                     return True
             
             return False
@@ -1278,8 +1768,28 @@ class PaddleOCRService:
             logger.error(f"Ошибка анализа содержимого: {str(e)}")
             return False
     
+    def _refresh_available(self) -> bool:
+        """Пересчёт закэшированного флага доступности (после инициализации/переинициализации)"""
+        self._available = bool(
+            PADDLEOCR_AVAILABLE
+            and self.ocr is not None
+            and callable(getattr(self.ocr, 'ocr', None))
+        )
+        # Раздельная детекция: у PaddleOCR 2.x ocr() принимает rec=False, в 3.x такого параметра нет
+        self._det_only_supported = False
+        if self._available:
+            try:
+                self._det_only_supported = 'rec' in inspect.signature(self.ocr.ocr).parameters
+            except (TypeError, ValueError):
+                pass
+        return self._available
+
     def is_available(self) -> bool:
-        """Проверка доступности PaddleOCR"""
+        """Проверка доступности PaddleOCR (закэшированный флаг, без диагностики)"""
+        return self._available
+
+    def diagnose(self) -> Dict[str, bool]:
+        """Подробная диагностика PaddleOCR с логированием; заодно обновляет закэшированный флаг"""
         try:
             # Проверяем все компоненты
             library_available = PADDLEOCR_AVAILABLE
@@ -1290,12 +1800,13 @@ class PaddleOCRService:
             if object_created:
                 try:
                     # Быстрая проверка - проверяем наличие метода ocr
-                    object_working = hasattr(self.ocr, 'ocr') and callable(getattr(self.ocr, 'ocr', None))
+                    object_working = callable(getattr(self.ocr, 'ocr', None))
                 except Exception as check_error:
                     logger.error(f"❌ Ошибка проверки работоспособности объекта: {str(check_error)}")
                     object_working = False
             
             available = library_available and object_created and object_working
+            self._available = available
             
             logger.info(f"🔍 PaddleOCR диагностика:")
             logger.info(f"  - Библиотека доступна: {library_available}")
@@ -1311,12 +1822,35 @@ class PaddleOCRService:
                 elif not object_working:
                     logger.error("❌ PaddleOCR объект создан, но не работает")
             
-            return available
+            return {
+                'library_available': library_available,
+                'object_created': object_created,
+                'object_working': object_working,
+                'available': available,
+            }
             
         except Exception as e:
             logger.error(f"❌ Ошибка проверки доступности PaddleOCR: {str(e)}")
-            return False
+            self._available = False
+            return {
+                'library_available': PADDLEOCR_AVAILABLE,
+                'object_created': False,
+                'object_working': False,
+                'available': False,
+            }
     
+    def shutdown(self) -> None:
+        """Остановка пулов сервиса (процессы OCR завершаются вместе с загруженными моделями)"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._cv_pool.shutdown(wait=False, cancel_futures=True)
+        # Остановленный общий экземпляр убираем из кэша фабрики: следующий вызов
+        # get_paddleocr_service() создаст рабочий сервис, а не отдаст этот с закрытыми пулами
+        if get_paddleocr_service.cache_info().currsize and get_paddleocr_service() is self:
+            get_paddleocr_service.cache_clear()
+
     def reinitialize(self) -> bool:
         """Принудительная переинициализация PaddleOCR"""
         try:
@@ -1326,12 +1860,27 @@ class PaddleOCRService:
             if self.ocr:
                 logger.info("🗑️ Очищаем старый объект PaddleOCR...")
                 self.ocr = None
+                self.ocr_loose = None
+                # Освобождаем память старой модели до загрузки новой, иначе на GPU
+                # в пике держатся обе (аллокатор Paddle сам кэш не отдаёт)
+                gc.collect()
+                try:
+                    import paddle
+                    if paddle.device.is_compiled_with_cuda():
+                        paddle.device.cuda.empty_cache()
+                except Exception as cache_error:
+                    logger.debug(f"Очистка кэша GPU пропущена: {str(cache_error)}")
+            
+            # Результаты старого движка больше не актуальны
+            with self._result_cache_lock:
+                self._result_cache.clear()
             
             # Переинициализируем
             self._initialize_ocr()
+            self._refresh_available()
             
-            # Проверяем результат
-            is_available = self.is_available()
+            # Проверяем результат (с подробной диагностикой в лог)
+            is_available = self.diagnose()['available']
             
             if is_available:
                 logger.info("✅ PaddleOCR успешно переинициализирован")
@@ -1344,3 +1893,10 @@ class PaddleOCRService:
             logger.error(f"❌ Ошибка переинициализации PaddleOCR: {str(e)}")
             logger.error(f"💡 Тип ошибки: {type(e).__name__}")
             return False
+
+
+@lru_cache(maxsize=None)
+def get_paddleocr_service() -> PaddleOCRService:
+    """Общий экземпляр сервиса на процесс: модели PaddleOCR загружаются один раз,
+    сколько бы потребителей (FontAnalyzer, скрипты проверки) ни запросили сервис."""
+    return PaddleOCRService()
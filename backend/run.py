@@ -2,14 +2,22 @@
 Скрипт для запуска FastAPI сервера
 """
 
+import os
+
 import uvicorn
 
 if __name__ == "__main__":
+    # Автоперезагрузка (слежение за файлами) — только для разработки: DEV_RELOAD=1.
+    # uvloop/httptools из uvicorn[standard] подключаются автоматически (loop/http = "auto")
+    reload = os.getenv("DEV_RELOAD", "0").strip().lower() in ("1", "true", "yes")
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=reload,
+        # Каждый воркер загружает свои модели PaddleOCR; с reload воркер всегда один
+        workers=1 if reload else max(1, int(os.getenv("WEB_CONCURRENCY", "1"))),
+        # Строка access-лога на каждый запрос — по явному запросу: ACCESS_LOG=1
+        access_log=os.getenv("ACCESS_LOG", "0").strip().lower() in ("1", "true", "yes"),
         log_level="info"
     )
-
@@ -5,50 +5,83 @@
 
 import sys
 import os
+import asyncio
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
-from app.services.paddleocr_service import PaddleOCRService
+from app.services.paddleocr_service import get_paddleocr_service
 import numpy as np
 import cv2
 
+# Готовые тестовые изображения из корня репозитория ("HELLO WORLD", "PRIVET MIR")
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+TEST_IMAGE_PATHS = [
+    os.path.join(REPO_ROOT, 'test_image.png'),
+    os.path.join(REPO_ROOT, 'test_russian.png'),
+]
+# Полный вывод результата (все регионы) — только с флагом --verbose
+VERBOSE = '--verbose' in sys.argv
+
+
+def load_test_images():
+    """Загружаем тестовые изображения в RGB (как ждёт сервис); если файлов нет — рисуем текст сами"""
+    images = []
+    for path in TEST_IMAGE_PATHS:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is not None:
+            images.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+            print(f"📸 Загружено тестовое изображение {os.path.basename(path)}: {images[-1].shape}")
+    if not images:
+        img = np.full((200, 400, 3), 255, dtype=np.uint8)
+        cv2.putText(img, "Test Text", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 2)
+        images.append(img)
+        print(f"📸 Создано тестовое изображение: {img.shape}")
+    return images
+
+
+async def analyze_all(service, images):
+    """Все изображения отправляются одновременно: сервис склеивает их вызовы движка в один пакет"""
+    return await asyncio.gather(*(service.detect_and_analyze_text(img) for img in images))
+
+
 def test_paddleocr():
     """Тестируем PaddleOCR"""
     print("🚀 Тестируем PaddleOCR...")
-    
-    # Создаем тестовое изображение с текстом
-    img = np.ones((200, 400, 3), dtype=np.uint8) * 255
-    cv2.putText(img, "Test Text", (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 2)
-    
-    print(f"📸 Создано тестовое изображение: {img.shape}")
-    
-    # Инициализируем PaddleOCR
-    service = PaddleOCRService()
-    
+
+    images = load_test_images()
+
+    # Инициализируем PaddleOCR (общий экземпляр: модели грузятся один раз на процесс)
+    service = get_paddleocr_service()
+
     if not service.is_available():
         print("❌ PaddleOCR недоступен")
         return False
-    
+
     print("✅ PaddleOCR доступен")
-    
+
     # Тестируем анализ
     try:
-        result = service._run_ocr_sync(img)
-        print(f"🔍 Результат анализа: {result}")
-        
-        if result.get('has_text'):
-            print("✅ Текст найден!")
-            print(f"📝 Содержимое: {result.get('text_content')}")
-            print(f"🎯 Уверенность: {result.get('confidence')}")
-            print(f"🔤 Множественные шрифты: {result.get('multiple_fonts')}")
-        else:
-            print("❌ Текст не найден")
-            print(f"💡 Ошибка: {result.get('error')}")
-        
-        return result.get('has_text', False)
-        
+        results = asyncio.run(analyze_all(service, images))
+
+        for i, result in enumerate(results, start=1):
+            print(f"🔍 Результат анализа #{i}: областей {len(result.get('text_regions') or [])}")
+            if VERBOSE:
+                print(result)
+            if result.get('has_text'):
+                print("✅ Текст найден!")
+                print(f"📝 Содержимое: {result.get('text_content')}")
+                print(f"🎯 Уверенность: {result.get('confidence')}")
+                print(f"🔤 Множественные шрифты: {result.get('multiple_fonts')}")
+            else:
+                print("❌ Текст не найден")
+                print(f"💡 Ошибка: {result.get('error')}")
+
+        return all(result.get('has_text', False) for result in results)
+
     except Exception as e:
         print(f"💥 Ошибка анализа: {str(e)}")
         return False
+    finally:
+        service.shutdown()
 
 if __name__ == "__main__":
     success = test_paddleocr()